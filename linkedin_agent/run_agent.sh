@@ -11,8 +11,9 @@ mkdir -p .pid
 # Function to start the agent
 start_agent() {
     echo "Starting LinkedIn Agent..."
-    # Run the scheduler in the background with nohup
-    PYTHONPATH=src nohup python3 src/scheduler.py > logs/stdout.log 2> logs/stderr.log &
+    # Run the supervisor (which runs and restarts the scheduler) in the background with nohup.
+    # All output is logged to rotating files under logs/; only interpreter crashes reach stderr.log
+    PYTHONPATH=src nohup python3 src/supervisor.py run "$@" > /dev/null 2>> logs/stderr.log &
     
     # Store the PID
     echo $! > .pid/agent.pid
@@ -38,25 +39,14 @@ stop_agent() {
 
 # Function to check agent status
 status_agent() {
-    if [ -f .pid/agent.pid ]; then
-        PID=$(cat .pid/agent.pid)
-        if ps -p $PID > /dev/null; then
-            echo "LinkedIn Agent is running (PID: $PID)"
-            echo "Recent logs:"
-            tail -n 5 logs/linkedin_agent.log
-        else
-            echo "LinkedIn Agent is not running (stale PID file)"
-            rm .pid/agent.pid
-        fi
-    else
-        echo "LinkedIn Agent is not running"
-    fi
+    PYTHONPATH=src python3 src/supervisor.py status
 }
 
 # Parse command line arguments
 case "$1" in
     start)
-        start_agent
+        shift
+        start_agent "$@"
         ;;
     stop)
         stop_agent
@@ -0,0 +1,173 @@
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+try:
+    import zstandard
+except ImportError:  # gzip is always available; zstd is smaller and faster when installed
+    zstandard = None
+
+
+class ContentArchive:
+    """
+    Content-addressed, compressed archive of feed snapshots, extracted posts and
+    generations. Objects are stored once per SHA-256 of their content under
+    objects/, and every put is recorded in a per-day JSONL index for lookups
+    and offline replay. Old days are dropped once the archive exceeds its size cap.
+    """
+
+    def __init__(self, root: str = None, max_bytes: int = None):
+        self.root = Path(root or os.getenv('ARCHIVE_DIR', 'archive'))
+        self.objects_dir = self.root / 'objects'
+        self.index_dir = self.root / 'index'
+        self.max_bytes = max_bytes or int(float(os.getenv('ARCHIVE_MAX_MB', 500)) * 1024 * 1024)
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self._compressor = zstandard.ZstdCompressor(level=10) if zstandard else None
+
+    def _object_path(self, digest: str, suffix: str) -> Path:
+        return self.objects_dir / digest[:2] / f"{digest[2:]}{suffix}"
+
+    def _find_object(self, digest: str) -> Path:
+        for suffix in ('.zst', '.gz'):
+            path = self._object_path(digest, suffix)
+            if path.exists():
+                return path
+        return None
+
+    def _compress(self, raw: bytes):
+        if self._compressor:
+            return self._compressor.compress(raw), '.zst'
+        return gzip.compress(raw, compresslevel=6, mtime=0), '.gz'
+
+    def put(self, kind: str, data, meta: Dict = None) -> str:
+        """Store data (bytes, str or JSON-serialisable) and index it under today's date"""
+        if isinstance(data, bytes):
+            raw, encoding = data, 'bytes'
+        elif isinstance(data, str):
+            raw, encoding = data.encode('utf-8'), 'text'
+        else:
+            raw, encoding = json.dumps(data, sort_keys=True, ensure_ascii=False).encode('utf-8'), 'json'
+        digest = hashlib.sha256(raw).hexdigest()
+
+        path = self._find_object(digest)
+        deduplicated = path is not None
+        if not deduplicated:
+            compressed, suffix = self._compress(raw)
+            path = self._object_path(digest, suffix)
+            path.parent.mkdir(exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(compressed)
+            os.replace(tmp_path, path)
+
+        entry = {
+            'ts': time.time(), 'kind': kind, 'hash': digest, 'encoding': encoding,
+            'size': len(raw), 'stored': path.stat().st_size, 'dedup': deduplicated, 'meta': meta or {}
+        }
+        with open(self.index_dir / f"{datetime.now():%Y-%m-%d}.jsonl", 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        return digest
+
+    def get(self, digest: str, encoding: str = 'bytes'):
+        """Load an archived object by hash, decoded as bytes, text or json"""
+        path = self._find_object(digest)
+        if path is None:
+            raise KeyError(digest)
+        with open(path, 'rb') as f:
+            compressed = f.read()
+        if path.suffix == '.zst':
+            if zstandard is None:
+                raise ImportError("zstandard is required to read .zst archive objects")
+            raw = zstandard.ZstdDecompressor().decompress(compressed)
+        else:
+            raw = gzip.decompress(compressed)
+        if encoding == 'text':
+            return raw.decode('utf-8')
+        if encoding == 'json':
+            return json.loads(raw)
+        return raw
+
+    def days(self) -> List[str]:
+        return sorted(path.stem for path in self.index_dir.glob('*.jsonl'))
+
+    def entries(self, day: str, kind: str = None) -> Iterator[Dict]:
+        """Index entries for a day (YYYY-MM-DD), optionally filtered by kind"""
+        path = self.index_dir / f"{day}.jsonl"
+        if not path.exists():
+            return
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # a partially written last line
+                if kind is None or entry['kind'] == kind:
+                    yield entry
+
+    def replay(self, day: str, kind: str = None) -> Iterator[Dict]:
+        """Index entries with their decoded content attached, for offline replay"""
+        for entry in self.entries(day, kind):
+            try:
+                yield {**entry, 'content': self.get(entry['hash'], entry['encoding'])}
+            except KeyError:
+                continue  # object already removed by retention
+
+    def total_bytes(self) -> int:
+        return sum(path.stat().st_size for path in self.objects_dir.rglob('*') if path.is_file())
+
+    def enforce_retention(self) -> int:
+        """
+        Drop the oldest days until the archive fits max_bytes; returns objects
+        removed. The current day is always kept, even if it alone is over.
+        """
+        removed = 0
+        today = f"{datetime.now():%Y-%m-%d}"
+        days = [day for day in self.days() if day != today]
+        while days and self.total_bytes() > self.max_bytes:
+            oldest = days.pop(0)
+            doomed = {entry['hash'] for entry in self.entries(oldest)}
+            # Objects deduplicated into later days (including today) must survive
+            for day in days + [today]:
+                doomed -= {entry['hash'] for entry in self.entries(day)}
+            for digest in doomed:
+                path = self._find_object(digest)
+                if path:
+                    path.unlink()
+                    removed += 1
+            (self.index_dir / f"{oldest}.jsonl").unlink()
+        return removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect the feed/generation archive")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    list_parser = subparsers.add_parser('list', help="List index entries for a day")
+    list_parser.add_argument('day', nargs='?', default=f"{datetime.now():%Y-%m-%d}")
+    list_parser.add_argument('--kind', choices=['page_source', 'post', 'generation'])
+    show_parser = subparsers.add_parser('show', help="Print an archived object")
+    show_parser.add_argument('hash')
+    subparsers.add_parser('stats', help="Archive size and days")
+    args = parser.parse_args()
+
+    archive = ContentArchive()
+    if args.command == 'list':
+        for entry in archive.entries(args.day, args.kind):
+            print(f"{datetime.fromtimestamp(entry['ts']):%H:%M:%S} {entry['kind']:<12} {entry['hash'][:16]} "
+                  f"{entry['size']:>9} -> {entry['stored']:>8}{' (dedup)' if entry['dedup'] else ''}")
+    elif args.command == 'show':
+        print(archive.get(args.hash).decode('utf-8', errors='replace'))
+    else:
+        print(f"{len(archive.days())} days, {archive.total_bytes() / 1048576:.1f} MB "
+              f"of {archive.max_bytes / 1048576:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,32 +9,56 @@ import pickle
 from pathlib import Path
 import socket
 import secrets
+import sys
+import threading
+from credential_store import CredentialStore
 
 class LinkedInAuthManager:
-    def __init__(self):
+    def __init__(self, profile: str = None, store: CredentialStore = None):
         self.config = {
             'redirect_uri': 'http://localhost:8000/callback',
             'scope': 'openid profile email w_member_social',
-            'session_file': '.linkedin_session'
+            'legacy_session_file': '.linkedin_session'
         }
+        self.profile = profile or os.getenv('LINKEDIN_ACCOUNT', 'default')
+        self.store = store or CredentialStore()
+        # Refresh this long before the access token expires (default: 7 days)
+        self.refresh_margin = int(os.getenv('LINKEDIN_REFRESH_MARGIN_SECONDS', 7 * 24 * 3600))
         self.session_data = None
-        self._load_session()
         self.personal_profile_id = None
+        self._refresh_lock = threading.Lock()
+        self._refresh_thread = None
+        self._load_session()
 
     def _load_session(self):
-        """Load existing session if available"""
-        session_path = Path(self.config['session_file'])
-        if session_path.exists():
-            try:
-                with open(session_path, 'rb') as f:
-                    self.session_data = pickle.load(f)
-                if self._is_session_valid():
-                    self._get_personal_profile_id()
-                    return True
-            except Exception:
-                pass
+        """Load existing session from the credential store if available"""
+        self._migrate_legacy_session()
+        self.session_data = self.store.get(self.profile)
+        if not self.session_data:
+            return False
+        # The profile ID is cached alongside the token; only ask LinkedIn when it's missing
+        self.personal_profile_id = self.session_data.get('personal_profile_id')
+        if self._is_session_valid():
+            if not self.personal_profile_id:
+                self._get_personal_profile_id()
+            return True
         return False
 
+    def _migrate_legacy_session(self):
+        """One-time import of the old pickled session file into the credential store"""
+        legacy_path = Path(self.config['legacy_session_file'])
+        if not legacy_path.exists() or self.store.get(self.profile) is not None:
+            return
+        try:
+            with open(legacy_path, 'rb') as f:
+                legacy_data = pickle.load(f)
+            if isinstance(legacy_data, dict):
+                self.store.put(self.profile, legacy_data)
+                legacy_path.unlink()
+                print(f"Migrated legacy LinkedIn session into {self.store.path}")
+        except Exception as e:
+            print(f"Could not migrate legacy session file: {str(e)}")
+
     def _get_user_profile(self):
         """Get user profile information using OpenID"""
         if not self.session_data or 'access_token' not in self.session_data:
@@ -71,8 +95,9 @@ class LinkedInAuthManager:
         if response.status_code == 200:
             profile = response.json()
             self.personal_profile_id = profile['sub']
-            self.session_data['personal_profile_id'] = self.personal_profile_id
-            self._save_session()
+            if self.session_data.get('personal_profile_id') != self.personal_profile_id:
+                self.session_data['personal_profile_id'] = self.personal_profile_id
+                self._save_session()
             return self.personal_profile_id
         return None
 
@@ -81,9 +106,8 @@ class LinkedInAuthManager:
         return self.personal_profile_id or self.session_data.get('personal_profile_id')
 
     def _save_session(self):
-        """Save session data"""
-        with open(self.config['session_file'], 'wb') as f:
-            pickle.dump(self.session_data, f)
+        """Save session data to the credential store"""
+        self.store.put(self.profile, self.session_data)
 
     def _is_session_valid(self):
         """Check if current session is valid"""
@@ -92,15 +116,94 @@ class LinkedInAuthManager:
         expiry = datetime.fromtimestamp(self.session_data.get('expires_at', 0))
         return datetime.now() < expiry
 
+    def seconds_until_expiry(self):
+        """Seconds left on the current access token (negative once expired, None without a session)"""
+        if not self.session_data:
+            return None
+        return self.session_data.get('expires_at', 0) - datetime.now().timestamp()
+
+    def can_refresh(self):
+        """Check if a usable refresh token and client credentials are available"""
+        if not self.session_data or not self.session_data.get('refresh_token'):
+            return False
+        refresh_expires_at = self.session_data.get('refresh_token_expires_at')
+        if refresh_expires_at and datetime.now().timestamp() >= refresh_expires_at:
+            return False
+        client_id, client_secret = self._client_credentials()
+        return bool(client_id and client_secret)
+
+    def _client_credentials(self):
+        """Client ID/secret for token refresh; the secret only ever comes from the environment"""
+        client_id = os.getenv('LINKEDIN_CLIENT_ID') or (self.session_data or {}).get('client_id')
+        client_secret = os.getenv('LINKEDIN_CLIENT_SECRET')
+        return client_id, client_secret
+
+    def _store_token_response(self, token_data):
+        """Update session data from an OAuth token endpoint response"""
+        now = datetime.now().timestamp()
+        self.session_data['access_token'] = token_data['access_token']
+        self.session_data['expires_at'] = now + token_data['expires_in']
+        if token_data.get('refresh_token'):
+            self.session_data['refresh_token'] = token_data['refresh_token']
+            if token_data.get('refresh_token_expires_in'):
+                self.session_data['refresh_token_expires_at'] = now + token_data['refresh_token_expires_in']
+
+    def refresh_access_token(self):
+        """Exchange the stored refresh token for a new access token"""
+        with self._refresh_lock:
+            # Another process sharing the store may already have refreshed
+            stored = self.store.get(self.profile)
+            if stored and stored.get('expires_at', 0) > (self.session_data or {}).get('expires_at', 0):
+                self.session_data = stored
+                if self.seconds_until_expiry() > self.refresh_margin:
+                    return True
+
+            if not self.can_refresh():
+                return self._is_session_valid()
+
+            client_id, client_secret = self._client_credentials()
+            data = {
+                'grant_type': 'refresh_token',
+                'refresh_token': self.session_data['refresh_token'],
+                'client_id': client_id,
+                'client_secret': client_secret
+            }
+            try:
+                response = requests.post('https://www.linkedin.com/oauth/v2/accessToken', data=data, timeout=30)
+            except requests.RequestException as e:
+                print(f"Error refreshing LinkedIn token: {str(e)}")
+                return False
+
+            if response.status_code != 200:
+                print(f"Failed to refresh LinkedIn token: {response.text}")
+                return False
+
+            self._store_token_response(response.json())
+            self._save_session()
+            print(f"Refreshed LinkedIn access token, valid until {datetime.fromtimestamp(self.session_data['expires_at'])}")
+            return True
+
+    def refresh_in_background(self):
+        """Start a token refresh on a daemon thread unless one is already running"""
+        if self._refresh_thread and self._refresh_thread.is_alive():
+            return self._refresh_thread
+        self._refresh_thread = threading.Thread(
+            target=self.refresh_access_token, name='linkedin-token-refresh', daemon=True
+        )
+        self._refresh_thread.start()
+        return self._refresh_thread
+
     def get_auth_url(self):
         """Generate LinkedIn authentication URL"""
-        print("\nPlease follow these steps to authenticate with LinkedIn:")
-        print("1. Go to https://www.linkedin.com/developers/apps")
-        print("2. Click 'Create app' if you haven't already")
-        print("3. Fill in the required information")
-        print("4. Once created, copy the Client ID when shown\n")
-        
-        client_id = input("Please enter your LinkedIn Client ID: ").strip()
+        client_id = os.getenv('LINKEDIN_CLIENT_ID')
+        if not client_id:
+            print("\nPlease follow these steps to authenticate with LinkedIn:")
+            print("1. Go to https://www.linkedin.com/developers/apps")
+            print("2. Click 'Create app' if you haven't already")
+            print("3. Fill in the required information")
+            print("4. Once created, copy the Client ID when shown\n")
+
+            client_id = input("Please enter your LinkedIn Client ID: ").strip()
         
         # Store client_id temporarily for the session
         self.config['client_id'] = client_id
@@ -124,9 +227,11 @@ class LinkedInAuthManager:
             print("State parameter mismatch! Possible security issue.")
             return False
             
-        print("\nPlease enter your LinkedIn Client Secret.")
-        print("You can find this in your LinkedIn App's settings page.")
-        client_secret = input("Client Secret: ").strip()
+        client_secret = os.getenv('LINKEDIN_CLIENT_SECRET')
+        if not client_secret:
+            print("\nPlease enter your LinkedIn Client Secret.")
+            print("You can find this in your LinkedIn App's settings page.")
+            client_secret = input("Client Secret: ").strip()
         
         token_url = 'https://www.linkedin.com/oauth/v2/accessToken'
         data = {
@@ -140,10 +245,8 @@ class LinkedInAuthManager:
         response = requests.post(token_url, data=data)
         if response.status_code == 200:
             token_data = response.json()
-            self.session_data = {
-                'access_token': token_data['access_token'],
-                'expires_at': datetime.now().timestamp() + token_data['expires_in']
-            }
+            self.session_data = {'client_id': self.config['client_id']}
+            self._store_token_response(token_data)
             
             # Get user profile data and personal profile ID
             user_data = self._get_user_profile()
@@ -156,8 +259,16 @@ class LinkedInAuthManager:
         return False
 
     def get_credentials(self):
-        """Get current credentials"""
+        """
+        Get current credentials, refreshing the access token when needed.
+        Tokens inside the refresh margin are refreshed in the background;
+        expired tokens are refreshed synchronously before giving up.
+        """
         if self._is_session_valid():
+            if self.seconds_until_expiry() < self.refresh_margin and self.can_refresh():
+                self.refresh_in_background()
+            return self.session_data
+        if self.session_data and self.refresh_access_token():
             return self.session_data
         return None
 
@@ -216,14 +327,21 @@ class AuthCallbackHandler(BaseHTTPRequestHandler):
         """
         self.wfile.write(html.encode())
 
-def authenticate():
+def authenticate(interactive: bool = None):
     """Main authentication function"""
     auth_manager = LinkedInAuthManager()
     
-    # Check for existing valid session
+    # Check for existing valid session (refreshing it if possible)
     if auth_manager.get_credentials():
         print("Using existing LinkedIn session")
         return auth_manager
+
+    # Never block an unattended process on the browser/stdin OAuth flow
+    if interactive is None:
+        interactive = sys.stdin.isatty()
+    if not interactive:
+        print("LinkedIn session expired and could not be refreshed; run auth_manager.py interactively")
+        return None
     
     # Start local server for OAuth callback
     server = HTTPServer(('localhost', 8000), AuthCallbackHandler)
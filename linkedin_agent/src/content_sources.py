@@ -0,0 +1,238 @@
+import json
+import os
+import re
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, List
+import requests
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup
+from post_record import Post
+
+ATOM_NS = '{http://www.w3.org/2005/Atom}'
+USER_AGENT = 'linkedin-agent/1.0 (+content ingestion)'
+
+# Cached entries per source are capped so the cache file stays small
+MAX_CACHED_ENTRIES = 100
+
+
+class ContentSource:
+    """
+    One configured source: an RSS/Atom feed (arXiv's API is Atom too) or an
+    HTML listing page whose items are picked with a CSS selector.
+    """
+
+    def __init__(self, url: str, name: str = None, kind: str = 'feed', selector: str = None):
+        self.url = url
+        self.name = name or re.sub(r'^https?://(www\.)?', '', url).split('/')[0]
+        self.kind = kind
+        self.selector = selector
+        if kind == 'html' and not selector:
+            raise ValueError(f"HTML source {self.name} needs a CSS selector")
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ContentSource':
+        return cls(data['url'], data.get('name'), data.get('type', 'feed'), data.get('selector'))
+
+
+def load_sources() -> List[ContentSource]:
+    """
+    Sources from CONTENT_SOURCES (comma-separated feed URLs) and the JSON list in
+    CONTENT_SOURCES_FILE (default content_sources.json), e.g.
+    [{"name": "arxiv-lg", "url": "http://export.arxiv.org/api/query?search_query=cat:cs.LG"},
+     {"name": "blog", "url": "https://example.com/blog", "type": "html", "selector": "article"}]
+    """
+    sources = [ContentSource(url.strip()) for url in os.getenv('CONTENT_SOURCES', '').split(',') if url.strip()]
+    path = Path(os.getenv('CONTENT_SOURCES_FILE', 'content_sources.json'))
+    if path.exists():
+        with open(path, 'r', encoding='utf-8') as f:
+            sources.extend(ContentSource.from_dict(entry) for entry in json.load(f))
+    return sources
+
+
+def _text(html: str) -> str:
+    """Plain text of an HTML fragment with whitespace collapsed"""
+    if not html:
+        return ''
+    if '<' in html:
+        html = BeautifulSoup(html, 'html.parser').get_text(' ')
+    return ' '.join(html.split())
+
+
+def _parse_date(value: str) -> float:
+    """Timestamp from an RFC 822 (RSS) or ISO 8601 (Atom) date, or None"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+
+def parse_feed(body: bytes) -> List[Dict]:
+    """Entries of an RSS 2.0 or Atom document as dicts of title, summary, link, author, published"""
+    root = ET.fromstring(body)
+    entries = []
+
+    for item in root.iter('item'):  # RSS
+        entries.append({
+            'title': _text(item.findtext('title')),
+            'summary': _text(item.findtext('description')),
+            'link': (item.findtext('link') or '').strip(),
+            'author': _text(item.findtext('author') or item.findtext('{http://purl.org/dc/elements/1.1/}creator')),
+            'published': _parse_date(item.findtext('pubDate'))
+        })
+
+    for entry in root.iter(f'{ATOM_NS}entry'):  # Atom, including arXiv
+        link = entry.find(f'{ATOM_NS}link[@rel="alternate"]')
+        if link is None:
+            link = entry.find(f'{ATOM_NS}link')
+        authors = [_text(author.findtext(f'{ATOM_NS}name')) for author in entry.iter(f'{ATOM_NS}author')]
+        entries.append({
+            'title': _text(entry.findtext(f'{ATOM_NS}title')),
+            'summary': _text(entry.findtext(f'{ATOM_NS}summary') or entry.findtext(f'{ATOM_NS}content')),
+            'link': link.get('href', '') if link is not None else '',
+            'author': ', '.join(author for author in authors[:3] if author),
+            'published': _parse_date(entry.findtext(f'{ATOM_NS}published') or entry.findtext(f'{ATOM_NS}updated'))
+        })
+
+    return entries
+
+
+def parse_listing(body: bytes, selector: str) -> List[Dict]:
+    """Items of an HTML listing page: the text of every element matching selector"""
+    soup = BeautifulSoup(body, 'html.parser')
+    entries = []
+    for element in soup.select(selector):
+        heading = element.find(['h1', 'h2', 'h3', 'h4'])
+        link = element.find('a', href=True)
+        entries.append({
+            'title': _text(heading.get_text(' ')) if heading else '',
+            'summary': _text(element.get_text(' ')),
+            'link': link['href'] if link else '',
+            'author': '',
+            'published': None
+        })
+    return entries
+
+
+class SourceIngestor:
+    """
+    Fetches every configured source concurrently with conditional GETs. The
+    ETag/Last-Modified validators and the parsed entries of each source are
+    cached on disk, so an unchanged source costs a single 304 response and its
+    entries are served from the cache.
+    """
+
+    def __init__(self, sources: List[ContentSource] = None, cache_path: str = None):
+        self.sources = load_sources() if sources is None else sources
+        self.cache_path = Path(cache_path or os.getenv('CONTENT_SOURCE_CACHE', '.content_source_cache.json'))
+        self.max_workers = int(os.getenv('SOURCE_FETCH_WORKERS', 8))
+        self.timeout = float(os.getenv('SOURCE_TIMEOUT', 15))
+        self.max_age = float(os.getenv('SOURCE_MAX_AGE_HOURS', 72)) * 3600
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers['User-Agent'] = USER_AGENT
+
+    def _load_cache(self) -> Dict:
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable source cache {self.cache_path}: {str(e)}")
+            return {}
+
+    def _save_cache(self, cache: Dict):
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_path.parent or '.', suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, self.cache_path)
+
+    def _fetch(self, source: ContentSource, cached: Dict, timeout: float) -> Dict:
+        """Fetch one source, returning its updated cache entry"""
+        headers = {}
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+
+        started = time.monotonic()
+        response = self.session.get(source.url, headers=headers, timeout=timeout)
+        if response.status_code == 304:
+            print(f"Source {source.name} not modified ({time.monotonic() - started:.1f}s)")
+            return {**cached, 'checked_at': time.time()}
+        response.raise_for_status()
+
+        if source.kind == 'html':
+            entries = parse_listing(response.content, source.selector)
+        else:
+            entries = parse_feed(response.content)
+        print(f"Fetched {len(entries)} entries from {source.name} ({time.monotonic() - started:.1f}s)")
+        return {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'checked_at': time.time(),
+            'entries': entries[:MAX_CACHED_ENTRIES]
+        }
+
+    def fetch_all(self, timeout: float = None) -> Dict[str, List[Dict]]:
+        """
+        Entries of every source by URL (names may repeat, e.g. two arXiv queries); a
+        failing source falls back to its cached entries. timeout caps the per-request
+        timeout, e.g. to a run deadline.
+        """
+        if not self.sources:
+            return {}
+        timeout = max(min(self.timeout, timeout or self.timeout), 1)
+        cache = self._load_cache()
+        results = {}
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(self.sources))) as pool:
+            futures = {
+                source: pool.submit(self._fetch, source, cache.get(source.url, {}), timeout)
+                for source in self.sources
+            }
+            for source, future in futures.items():
+                try:
+                    cache[source.url] = future.result()
+                except (requests.RequestException, ET.ParseError) as e:
+                    print(f"Error fetching source {source.name}: {str(e)}")
+                results[source.url] = cache.get(source.url, {}).get('entries', [])
+
+        self._save_cache(cache)
+        return results
+
+    def fetch_posts(self, timeout: float = None) -> List[Post]:
+        """Recent entries of every source, normalised into Post records"""
+        cutoff = time.time() - self.max_age
+        names = {source.url: source.name for source in self.sources}
+        posts = []
+        for url, entries in self.fetch_all(timeout).items():
+            name = names[url]
+            for entry in entries:
+                if entry.get('published') and entry['published'] < cutoff:
+                    continue
+                title, summary = entry['title'], entry['summary']
+                if title and summary.startswith(title):
+                    title = ''  # listing items already start with their heading
+                content = '\n\n'.join(part for part in (title, summary) if part)
+                if not content:
+                    continue
+                posts.append(Post(content, entry.get('author') or name, timestamp=entry.get('published'),
+                                  source=f"source:{name}"))
+        return posts
@@ -0,0 +1,124 @@
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows has no fcntl; writes stay atomic, just unserialised
+    fcntl = None
+
+
+class CredentialStore:
+    """
+    JSON credential store shared by the agent and scheduler processes.
+
+    Every profile (LinkedIn account) lives under its own key in a single file.
+    Writes go to a temp file in the same directory and are renamed into place,
+    so readers never see a half-written file. Reads are served from an
+    in-process cache that is invalidated when the file's mtime or size changes.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = Path(path or os.getenv('LINKEDIN_CREDENTIAL_STORE', '.linkedin_credentials.json'))
+        self.lock_path = self.path.with_name(self.path.name + '.lock')
+        self._cache = None
+        self._signature = None
+        self._lock = threading.Lock()
+
+    def _file_signature(self):
+        """Return an (mtime, size) tuple for the store file, or None if missing"""
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _read_profiles(self) -> Dict[str, Dict]:
+        """Return all profiles, re-reading the file only if it changed on disk"""
+        signature = self._file_signature()
+        if self._cache is not None and signature == self._signature:
+            return self._cache
+
+        profiles = {}
+        if signature is not None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    profiles = json.load(f).get('profiles', {})
+            except (OSError, ValueError) as e:
+                print(f"Could not read credential store {self.path}: {str(e)}")
+
+        self._cache = profiles
+        self._signature = signature
+        return profiles
+
+    def _write_profiles(self, profiles: Dict[str, Dict]):
+        """Atomically replace the store file with the given profiles"""
+        directory = self.path.parent if str(self.path.parent) else Path('.')
+        directory.mkdir(parents=True, exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f'.{self.path.name}.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'version': 1, 'profiles': profiles}, f, indent=2, sort_keys=True)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        self._cache = profiles
+        self._signature = self._file_signature()
+
+    def _modify(self, mutate):
+        """Run a read-modify-write cycle under thread and (where available) file locks"""
+        with self._lock:
+            lock_file = None
+            try:
+                if fcntl is not None:
+                    self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+                    lock_file = open(self.lock_path, 'a')
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                # Always re-read under the lock so another process's write isn't lost
+                self._signature = None
+                profiles = dict(self._read_profiles())
+                mutate(profiles)
+                self._write_profiles(profiles)
+            finally:
+                if lock_file is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                    lock_file.close()
+
+    def get(self, profile: str) -> Optional[Dict]:
+        """Return a copy of the stored credentials for a profile"""
+        with self._lock:
+            data = self._read_profiles().get(profile)
+        return dict(data) if data is not None else None
+
+    def put(self, profile: str, data: Dict):
+        """Store credentials for a profile, replacing any previous entry"""
+        def mutate(profiles):
+            profiles[profile] = dict(data)
+        self._modify(mutate)
+
+    def update(self, profile: str, **fields):
+        """Merge fields into a profile's stored credentials"""
+        def mutate(profiles):
+            profiles[profile] = {**profiles.get(profile, {}), **fields}
+        self._modify(mutate)
+
+    def delete(self, profile: str):
+        """Remove a profile from the store"""
+        def mutate(profiles):
+            profiles.pop(profile, None)
+        self._modify(mutate)
+
+    def profiles(self) -> List[str]:
+        """List the profiles that have stored credentials"""
+        with self._lock:
+            return sorted(self._read_profiles())
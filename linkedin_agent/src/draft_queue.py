@@ -0,0 +1,178 @@
+import json
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from post_record import Post
+
+# Pre-generation ends a minute before the slot and needs a few minutes to be useful
+MIN_LEAD_MINUTES = 5
+
+# A draft still 'publishing' after this long belongs to a publisher that was killed
+STUCK_PUBLISHING_SECONDS = 3600
+
+
+def lead_minutes() -> int:
+    """PREGENERATE_LEAD_MINUTES, or 0 (pre-generation disabled) if it is too short to finish before the slot"""
+    lead = int(os.getenv('PREGENERATE_LEAD_MINUTES', 30))
+    if 0 < lead < MIN_LEAD_MINUTES:
+        print(f"PREGENERATE_LEAD_MINUTES={lead} leaves no time to pre-generate, "
+              f"need at least {MIN_LEAD_MINUTES}; pre-generation disabled")
+        return 0
+    return max(lead, 0)
+
+
+def pregeneration_start(slot_hour: int, lead: int) -> str:
+    """HH:MM at which pre-generation for a slot starts"""
+    return (datetime.now().replace(hour=slot_hour, minute=0) - timedelta(minutes=lead)).strftime("%H:%M")
+
+
+def pregeneration_timeout(lead: int) -> float:
+    """Wall-clock limit of a pre-generation run: it must end a minute before the slot"""
+    return lead * 60 - 60
+
+
+class DraftQueue:
+    """
+    Ready queue of pre-generated posts in a local SQLite file. Drafts are
+    generated ahead of a posting slot and claimed at slot time, best score
+    first; drafts older than the freshness window expire instead of being
+    published. Published drafts are kept for a while so the same source
+    post is never drafted twice.
+
+    A draft whose publish may have gone out (timeout, server error) is marked
+    'abandoned', as is one left 'publishing' by a killed publisher once it
+    times out. Neither is put back in the queue, because the post may already
+    be live; their source stays used either way.
+    """
+
+    def __init__(self, path: str = None, max_age_hours: float = None):
+        self.path = path or os.getenv('DRAFT_QUEUE_PATH', 'drafts.db')
+        self.max_age = (max_age_hours or float(os.getenv('DRAFT_MAX_AGE_HOURS', 6))) * 3600
+        with self._connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS drafts (
+                    id TEXT PRIMARY KEY,
+                    content TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    source_hash TEXT NOT NULL,
+                    score REAL NOT NULL,
+                    status TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS drafts_ready ON drafts (status, score)")
+            conn.execute("CREATE INDEX IF NOT EXISTS drafts_source ON drafts (source_hash)")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    @contextmanager
+    def _connection(self):
+        conn = self._connect()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def has_source(self, source_hash: str) -> bool:
+        """True if a post was already drafted or published from this source content"""
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM drafts WHERE source_hash = ? "
+                "AND status IN ('ready', 'publishing', 'published', 'abandoned')",
+                (source_hash,)
+            ).fetchone()
+        return row is not None
+
+    def add(self, content: str, source: Post, score: float, status: str = 'ready') -> Optional[str]:
+        """Queue a draft; returns its ID, or None if its source was already used"""
+        if self.has_source(source.content_hash):
+            return None
+        draft_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT INTO drafts (id, content, source, source_hash, score, status, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (draft_id, content, json.dumps(source.to_row()), source.content_hash, score, status, now, now)
+            )
+        return draft_id
+
+    def record_published(self, content: str, source: Post):
+        """Remember a post published on demand, so it is not drafted again"""
+        self.add(content, source, 0.0, status='published')
+
+    def ready_count(self) -> int:
+        with self._connection() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM drafts WHERE status = 'ready' AND created_at >= ?",
+                (time.time() - self.max_age,)
+            ).fetchone()[0]
+
+    def claim_best(self) -> Optional[Dict]:
+        """Take the highest-scoring fresh draft for publishing, expiring stale ones on the way"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            # IMMEDIATE takes the write lock up front so two publishers can't claim the same draft
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "UPDATE drafts SET status = 'expired', updated_at = ? WHERE status = 'ready' AND created_at < ?",
+                (now, now - self.max_age)
+            )
+            abandoned = conn.execute(
+                "UPDATE drafts SET status = 'abandoned', updated_at = ? WHERE status = 'publishing' AND updated_at < ?",
+                (now, now - STUCK_PUBLISHING_SECONDS)
+            ).rowcount
+            row = conn.execute(
+                "SELECT id, content, source, score, created_at FROM drafts WHERE status = 'ready' "
+                "ORDER BY score DESC, created_at DESC LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                conn.execute("UPDATE drafts SET status = 'publishing', updated_at = ? WHERE id = ?", (now, row[0]))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+        if abandoned:
+            print(f"Marked {abandoned} drafts abandoned after an interrupted publish; check LinkedIn before reposting")
+        if row is None:
+            return None
+        draft_id, content, source, score, created_at = row
+        return {
+            'id': draft_id, 'content': content, 'source': Post.from_row(json.loads(source)),
+            'score': score, 'age_seconds': now - created_at
+        }
+
+    def _set_status(self, draft_id: str, status: str):
+        with self._connection() as conn:
+            conn.execute("UPDATE drafts SET status = ?, updated_at = ? WHERE id = ?", (status, time.time(), draft_id))
+
+    def mark_published(self, draft_id: str):
+        self._set_status(draft_id, 'published')
+
+    def release(self, draft_id: str):
+        """Return a claimed draft to the queue after LinkedIn rejected it"""
+        self._set_status(draft_id, 'ready')
+
+    def abandon(self, draft_id: str):
+        """Retire a claimed draft whose publish may have gone out (timeout, server error)"""
+        self._set_status(draft_id, 'abandoned')
+
+    def purge(self, keep_days: float = 30) -> int:
+        """Delete finished drafts older than keep_days; returns rows removed"""
+        with self._connection() as conn:
+            return conn.execute(
+                "DELETE FROM drafts WHERE status != 'ready' AND updated_at < ?",
+                (time.time() - keep_days * 86400,)
+            ).rowcount
@@ -0,0 +1,399 @@
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, List
+from urllib.parse import quote
+import requests
+from browser_profiles import get_browser_profile, build_chrome_options, apply_network_blocking
+
+LOGIN_URL = 'https://www.linkedin.com/login'
+FEED_URL = 'https://www.linkedin.com/feed/'
+POST_SELECTOR = 'div.feed-shared-update-v2'
+HASHTAG_URL = 'https://www.linkedin.com/feed/hashtag/{tag}/'
+SEARCH_URL = 'https://www.linkedin.com/search/results/content/?keywords={query}&sortBy=%22date_posted%22'
+
+CONTENT_SELECTORS = [
+    'span.break-words',
+    'div.feed-shared-text',
+    'div.feed-shared-text-view',
+    'div.feed-shared-update-v2__description-wrapper'
+]
+
+AUTHOR_SELECTORS = [
+    'span.feed-shared-actor__name',
+    'span.update-components-actor__name',
+    'a.app-aware-link span'
+]
+
+# Runs inside the page and returns every post on it as one JSON string, so
+# extraction costs a single round trip instead of several per post.
+EXTRACT_POSTS_JS = """
+(() => {
+    const contentSelectors = %s;
+    const authorSelectors = %s;
+    const firstText = (post, selectors) => {
+        for (const selector of selectors) {
+            const element = post.querySelector(selector);
+            const text = element && element.innerText.trim();
+            if (text) return text;
+        }
+        return null;
+    };
+    return JSON.stringify(Array.from(document.querySelectorAll('%s')).map(post => ({
+        urn: post.getAttribute('data-urn') || (post.closest('[data-urn]') || post).getAttribute('data-urn'),
+        content: firstText(post, contentSelectors),
+        author: firstText(post, authorSelectors) || 'Unknown Author'
+    })));
+})()
+""" % (json.dumps(CONTENT_SELECTORS), json.dumps(AUTHOR_SELECTORS), POST_SELECTOR)
+
+SCROLL_JS = "window.scrollTo(0, document.body.scrollHeight);"
+
+
+def targeted_urls() -> List[str]:
+    """Hashtag and content-search pages from SCRAPER_HASHTAGS and SCRAPER_SEARCH_QUERIES (comma separated)"""
+    hashtags = [tag.strip().lstrip('#') for tag in os.getenv('SCRAPER_HASHTAGS', '').split(',') if tag.strip()]
+    queries = [query.strip() for query in os.getenv('SCRAPER_SEARCH_QUERIES', '').split(',') if query.strip()]
+    return ([HASHTAG_URL.format(tag=quote(tag.lower())) for tag in hashtags]
+            + [SEARCH_URL.format(query=quote(query)) for query in queries])
+
+
+class FeedScraper(ABC):
+    """Common interface for the browser backends used to read the LinkedIn feed"""
+
+    def __init__(self, profile: Dict = None):
+        self.profile = profile or get_browser_profile()
+
+    @abstractmethod
+    def login(self, email: str, password: str):
+        ...
+
+    @abstractmethod
+    def open(self, url: str, wait_selector: str = None, timeout: float = 10):
+        ...
+
+    @abstractmethod
+    def evaluate(self, script: str):
+        """Evaluate a JavaScript expression in the page and return its value"""
+
+    @abstractmethod
+    def new_tab(self):
+        """Open a blank tab with the profile's network blocking applied and make it current"""
+
+    @abstractmethod
+    def switch_to(self, tab):
+        ...
+
+    @abstractmethod
+    def close_tab(self, tab):
+        """Close a tab opened with new_tab and return to the main tab"""
+
+    @abstractmethod
+    def navigate(self, url: str):
+        """Start loading url in the current tab without waiting for the load to finish"""
+
+    def wait_for_selector(self, selector: str, timeout: float = 10):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                if self.evaluate(f"!!document.querySelector({json.dumps(selector)})"):
+                    return
+            except Exception:
+                pass  # the tab may still be between documents while navigating
+            time.sleep(0.25)
+        raise TimeoutError(f"Timed out waiting for {selector}")
+
+    def scroll(self, times: int, pause: float = 2):
+        for _ in range(times):
+            self.evaluate(SCROLL_JS)
+            time.sleep(pause)
+
+    def scrape_pages(self, urls: List[str], scrolls: int, pause: float = 2, max_tabs: int = 4,
+                     with_source: bool = False) -> List[Dict]:
+        """
+        Scrape several pages in parallel tabs of the logged-in browser. All tabs
+        load at once and each scroll round touches every tab before a single
+        pause, so network and lazy-loading waits overlap instead of adding up.
+        Returns {url, posts, page_source} per url, in order.
+        """
+        results = []
+        for start in range(0, len(urls), max_tabs):
+            batch = urls[start:start + max_tabs]
+            tabs = []
+            try:
+                for url in batch:
+                    tabs.append(self.new_tab())
+                    self.navigate(url)
+
+                for url, tab in zip(batch, tabs):
+                    self.switch_to(tab)
+                    try:
+                        self.wait_for_selector(POST_SELECTOR)
+                    except TimeoutError:
+                        print(f"No posts loaded yet on {url}")
+
+                for _ in range(scrolls):
+                    for tab in tabs:
+                        self.switch_to(tab)
+                        self.evaluate(SCROLL_JS)
+                    time.sleep(pause)
+
+                for url, tab in zip(batch, tabs):
+                    self.switch_to(tab)
+                    try:
+                        posts = self.extract_posts()
+                        page_source = self.page_source() if with_source else None
+                    except Exception as e:
+                        print(f"Error extracting posts from {url}: {str(e)}")
+                        posts, page_source = [], None
+                    results.append({'url': url, 'posts': posts, 'page_source': page_source})
+            finally:
+                for tab in tabs:
+                    try:
+                        self.close_tab(tab)
+                    except Exception as e:
+                        print(f"Error closing tab: {str(e)}")
+        return results
+
+    def page_source(self) -> str:
+        return self.evaluate("document.documentElement.outerHTML")
+
+    def extract_posts(self) -> List[Dict]:
+        """Return {urn, content, author} for every post currently in the page"""
+        return [post for post in json.loads(self.evaluate(EXTRACT_POSTS_JS) or '[]') if post.get('content')]
+
+    @abstractmethod
+    def close(self):
+        ...
+
+
+class SeleniumFeedScraper(FeedScraper):
+    """Chrome driven through chromedriver/WebDriver (the original backend)"""
+
+    def __init__(self, profile: Dict = None):
+        super().__init__(profile)
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+        from webdriver_manager.chrome import ChromeDriverManager
+
+        service = Service(ChromeDriverManager().install())
+        self.driver = webdriver.Chrome(service=service, options=build_chrome_options(self.profile))
+        apply_network_blocking(self.driver, self.profile)
+        self.main_tab = self.driver.current_window_handle
+
+    def login(self, email: str, password: str):
+        from selenium.webdriver.common.by import By
+
+        self.driver.get(LOGIN_URL)
+        time.sleep(2)
+        self.driver.find_element(By.ID, 'username').send_keys(email)
+        self.driver.find_element(By.ID, 'password').send_keys(password)
+        self.driver.find_element(By.CLASS_NAME, 'login__form_action_container').click()
+        # Wait for login to complete
+        time.sleep(5)
+
+    def open(self, url: str, wait_selector: str = None, timeout: float = 10):
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+
+        self.driver.get(url)
+        if wait_selector:
+            WebDriverWait(self.driver, timeout).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, wait_selector))
+            )
+
+    def evaluate(self, script: str):
+        return self.driver.execute_script("return " + script.strip())
+
+    def new_tab(self):
+        self.driver.switch_to.new_window('tab')
+        # CDP commands apply per target, so every tab needs its own blocking rules
+        apply_network_blocking(self.driver, self.profile)
+        return self.driver.current_window_handle
+
+    def switch_to(self, tab):
+        self.driver.switch_to.window(tab)
+
+    def close_tab(self, tab):
+        self.driver.switch_to.window(tab)
+        self.driver.close()
+        self.driver.switch_to.window(self.main_tab)
+
+    def navigate(self, url: str):
+        # Unlike driver.get, Page.navigate returns once the navigation starts
+        self.driver.execute_cdp_cmd('Page.navigate', {'url': url})
+
+    def close(self):
+        self.driver.quit()
+
+
+class CDPFeedScraper(FeedScraper):
+    """
+    Chrome driven directly over the DevTools Protocol websocket: no chromedriver
+    download and no WebDriver HTTP hop per command.
+    """
+
+    CHROME_CANDIDATES = ['google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser', 'chrome']
+
+    def __init__(self, profile: Dict = None):
+        super().__init__(profile)
+        try:
+            import websocket
+        except ImportError:
+            raise ImportError("The websocket-client package is required for the CDP scraper backend")
+        self._websocket = websocket
+
+        chrome_binary = self._chrome_binary()
+        self.user_data_dir = tempfile.mkdtemp(prefix='linkedin-cdp-')
+        self.process = subprocess.Popen(
+            [chrome_binary, *self.profile['arguments'],
+             '--remote-debugging-port=0', f'--user-data-dir={self.user_data_dir}', 'about:blank'],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        self._message_id = 0
+        try:
+            self.devtools_url = f'http://127.0.0.1:{self._wait_for_devtools_port()}'
+            targets = requests.get(f'{self.devtools_url}/json/list', timeout=10).json()
+            page = next(target for target in targets if target.get('type') == 'page')
+            self.main_tab = self._attach(page)
+        except Exception:
+            self.close()
+            raise
+
+    def _attach(self, target: Dict) -> Dict:
+        """Connect to a page target over its own websocket and make it the current tab"""
+        self.ws = self._websocket.create_connection(target['webSocketDebuggerUrl'], timeout=30, suppress_origin=True)
+        self.send('Page.enable')
+        self.send('Runtime.enable')
+        if self.profile['blocked_urls']:
+            self.send('Network.enable')
+            self.send('Network.setBlockedURLs', {'urls': self.profile['blocked_urls']})
+        return {'id': target['id'], 'ws': self.ws}
+
+    def _chrome_binary(self) -> str:
+        binary = os.getenv('CHROME_BINARY')
+        if binary:
+            return binary
+        for candidate in self.CHROME_CANDIDATES:
+            path = shutil.which(candidate)
+            if path:
+                return path
+        raise FileNotFoundError("Chrome not found; set CHROME_BINARY")
+
+    def _wait_for_devtools_port(self, timeout: float = 20) -> int:
+        """Chrome writes its chosen debugging port to DevToolsActivePort in the profile dir"""
+        port_file = Path(self.user_data_dir) / 'DevToolsActivePort'
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Chrome exited with code {self.process.returncode}")
+            if port_file.exists():
+                lines = port_file.read_text().splitlines()
+                if lines and lines[0].isdigit():
+                    return int(lines[0])
+            time.sleep(0.1)
+        raise TimeoutError("Chrome did not expose a DevTools port")
+
+    def send(self, method: str, params: Dict = None) -> Dict:
+        """Send a CDP command and wait for its result, skipping unrelated events"""
+        self._message_id += 1
+        message_id = self._message_id
+        self.ws.send(json.dumps({'id': message_id, 'method': method, 'params': params or {}}))
+        while True:
+            message = json.loads(self.ws.recv())
+            if message.get('id') == message_id:
+                if 'error' in message:
+                    raise RuntimeError(f"{method} failed: {message['error'].get('message')}")
+                return message.get('result', {})
+
+    def evaluate(self, script: str):
+        result = self.send('Runtime.evaluate', {
+            'expression': script, 'returnByValue': True, 'awaitPromise': True
+        })
+        if 'exceptionDetails' in result:
+            raise RuntimeError(f"Script failed: {result['exceptionDetails'].get('text')}")
+        return result.get('result', {}).get('value')
+
+    def new_tab(self):
+        # Recent Chrome versions only accept PUT for /json/new
+        target = requests.put(f'{self.devtools_url}/json/new?about:blank', timeout=10).json()
+        return self._attach(target)
+
+    def switch_to(self, tab):
+        self.ws = tab['ws']
+
+    def close_tab(self, tab):
+        tab['ws'].close()
+        requests.get(f"{self.devtools_url}/json/close/{tab['id']}", timeout=10)
+        self.ws = self.main_tab['ws']
+
+    def navigate(self, url: str):
+        self.send('Page.navigate', {'url': url})
+
+    def _wait_for(self, expression: str, timeout: float):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.evaluate(expression):
+                return
+            time.sleep(0.25)
+        raise TimeoutError(f"Timed out waiting for: {expression}")
+
+    def open(self, url: str, wait_selector: str = None, timeout: float = 10):
+        self.send('Page.navigate', {'url': url})
+        # Give the navigation a moment to replace the old document before polling it
+        time.sleep(0.5)
+        self._wait_for("document.readyState !== 'loading'", timeout)
+        if wait_selector:
+            self._wait_for(f"!!document.querySelector({json.dumps(wait_selector)})", timeout)
+
+    def _type_into(self, element_id: str, text: str):
+        self.evaluate(f"document.getElementById({json.dumps(element_id)}).focus()")
+        self.send('Input.insertText', {'text': text})
+
+    def login(self, email: str, password: str):
+        self.open(LOGIN_URL, wait_selector='#username')
+        self._type_into('username', email)
+        self._type_into('password', password)
+        self.evaluate(
+            "(document.querySelector('.login__form_action_container button')"
+            " || document.querySelector('button[type=submit]')).click()"
+        )
+        # Wait for login to complete
+        time.sleep(5)
+
+    def close(self):
+        try:
+            if getattr(self, 'ws', None):
+                try:
+                    self.send('Browser.close')
+                except Exception:
+                    pass
+                self.ws.close()
+        finally:
+            if self.process.poll() is None:
+                self.process.terminate()
+                try:
+                    self.process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    self.process.kill()
+            shutil.rmtree(self.user_data_dir, ignore_errors=True)
+
+
+SCRAPER_BACKENDS = {
+    'selenium': SeleniumFeedScraper,
+    'cdp': CDPFeedScraper
+}
+
+
+def create_feed_scraper(backend: str = None, profile: Dict = None) -> FeedScraper:
+    """Create the scraper backend named by SCRAPER_BACKEND (selenium or cdp)"""
+    backend = backend or os.getenv('SCRAPER_BACKEND', 'selenium')
+    if backend not in SCRAPER_BACKENDS:
+        raise ValueError(f"Unknown scraper backend '{backend}', expected one of {sorted(SCRAPER_BACKENDS)}")
+    return SCRAPER_BACKENDS[backend](profile)
@@ -0,0 +1,133 @@
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List
+from post_record import Post
+
+# Counters are halved once a stage has seen this many posts, so old runs fade out
+STATS_WINDOW = 2000
+
+
+class FilterStage:
+    """
+    One relevance check in a FilterPipeline. Keeps its own call, pass and
+    timing counters; cost_hint (seconds per post) is the prior used until
+    enough posts have been measured.
+    """
+
+    def __init__(self, name: str, predicate: Callable[[Post], bool], cost_hint: float = 1e-6):
+        self.name = name
+        self.predicate = predicate
+        self.cost_hint = cost_hint
+        self.calls = 0
+        self.passed = 0
+        self.seconds = 0.0
+
+    def __call__(self, post: Post) -> bool:
+        start = time.perf_counter()
+        result = bool(self.predicate(post))
+        self.seconds += time.perf_counter() - start
+        self.calls += 1
+        self.passed += result
+        if self.calls >= STATS_WINDOW:
+            self.calls //= 2
+            self.passed //= 2
+            self.seconds /= 2
+        return result
+
+    @property
+    def pass_rate(self) -> float:
+        # Laplace smoothing keeps unmeasured stages at 50%
+        return (self.passed + 1) / (self.calls + 2)
+
+    @property
+    def cost(self) -> float:
+        """Average seconds per post, starting from cost_hint"""
+        return (self.seconds + self.cost_hint) / (self.calls + 1)
+
+    @property
+    def rank(self) -> float:
+        """Expected cost per rejected post; the cheapest, most selective stages run first"""
+        return self.cost / max(1 - self.pass_rate, 1e-9)
+
+
+class FilterPipeline:
+    """
+    Short-circuiting cascade of independent checks. A post is relevant only if
+    every stage passes, so stages are re-ordered by measured cost / rejection
+    rate and evaluation stops at the first rejection. Counters can be saved
+    between runs so the ordering starts from what previous runs learned.
+    """
+
+    def __init__(self, stages: List[FilterStage] = None, adaptive: bool = True, reorder_every: int = 25,
+                 stats_path: str = None):
+        self.stages = list(stages or [])
+        self.adaptive = adaptive
+        self.reorder_every = reorder_every
+        self.stats_path = Path(stats_path) if stats_path else None
+        self.evaluated = 0
+        self.accepted = 0
+
+    def add_stage(self, name: str, predicate: Callable[[Post], bool], cost_hint: float = 1e-6,
+                  position: int = None) -> FilterStage:
+        """Add a check (e.g. language detection, dedup, semantic score); appended by default"""
+        if any(stage.name == name for stage in self.stages):
+            raise ValueError(f"Filter stage {name!r} already exists")
+        stage = FilterStage(name, predicate, cost_hint)
+        self.stages.insert(len(self.stages) if position is None else position, stage)
+        return stage
+
+    def reorder(self):
+        # Stable sort, so stages with equal priors keep their declared order
+        self.stages.sort(key=lambda stage: stage.rank)
+
+    def evaluate(self, post: Post) -> bool:
+        """True if the post passes every stage"""
+        self.evaluated += 1
+        if self.adaptive and self.evaluated % self.reorder_every == 0:
+            self.reorder()
+        for stage in self.stages:
+            if not stage(post):
+                return False
+        self.accepted += 1
+        return True
+
+    def filter(self, posts: List[Post]) -> List[Post]:
+        return [post for post in posts if self.evaluate(post)]
+
+    def load_stats(self):
+        """Restore counters saved by a previous run (call after adding stages) and order stages by them"""
+        if not self.stats_path:
+            return
+        try:
+            with open(self.stats_path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable filter stats {self.stats_path}: {str(e)}")
+            return
+        for stage in self.stages:
+            if stage.name in saved:
+                stage.calls, stage.passed, stage.seconds = saved[stage.name]
+        if self.adaptive:
+            self.reorder()
+
+    def save_stats(self):
+        if not self.stats_path:
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=self.stats_path.parent, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({stage.name: [stage.calls, stage.passed, stage.seconds] for stage in self.stages}, f)
+        os.replace(tmp_path, self.stats_path)
+
+    def stats_summary(self) -> str:
+        """One line per stage, in evaluation order, with pass rate and cost"""
+        lines = [f"{self.accepted}/{self.evaluated} posts accepted this run"]
+        for stage in self.stages:
+            lines.append(
+                f"{stage.name}: {stage.calls} checked, {stage.pass_rate:.0%} pass, {stage.cost * 1e6:.1f}us avg"
+            )
+        return '\n'.join(lines)
@@ -0,0 +1,273 @@
+import json
+import os
+import sqlite3
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+DEFAULT_QUEUE_URL = 'sqlite:///jobs.db'
+
+
+class Job:
+    """A leased job; the lease token proves ownership for ack/fail/extend"""
+
+    def __init__(self, job_id, queue: str, payload: Dict, attempts: int, lease_token: str):
+        self.id = job_id
+        self.queue = queue
+        self.payload = payload
+        self.attempts = attempts
+        self.lease_token = lease_token
+
+    def __repr__(self):
+        return f"Job(id={self.id!r}, queue={self.queue!r}, attempts={self.attempts})"
+
+
+class JobQueue(ABC):
+    """
+    Durable at-least-once job queue with leases. A leased job is invisible to
+    other workers until its visibility timeout passes; if the worker dies
+    without acking, the job becomes visible again and is retried.
+    """
+
+    def __init__(self, max_attempts: int = None):
+        self.max_attempts = max_attempts or int(os.getenv('JOB_MAX_ATTEMPTS', 3))
+
+    @abstractmethod
+    def enqueue(self, queue: str, payload: Dict, delay: float = 0) -> str:
+        ...
+
+    @abstractmethod
+    def lease(self, queue: str, lease_seconds: float) -> Optional[Job]:
+        ...
+
+    @abstractmethod
+    def ack(self, job: Job):
+        ...
+
+    @abstractmethod
+    def fail(self, job: Job, retry_delay: float = 30, retry: bool = True):
+        """Release a job for another attempt after retry_delay, or park it as dead if retry is False"""
+
+    @abstractmethod
+    def extend(self, job: Job, lease_seconds: float):
+        ...
+
+    @abstractmethod
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        ...
+
+
+class SQLiteJobQueue(JobQueue):
+    """Job queue in a local SQLite file, safe to share between processes on one host"""
+
+    def __init__(self, path: str, max_attempts: int = None):
+        super().__init__(max_attempts)
+        self.path = path
+        with self._connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    queue TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    visible_at REAL NOT NULL,
+                    lease_token TEXT,
+                    created_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (queue, status, visible_at)")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def _connection(self):
+        conn = self._connect()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def enqueue(self, queue: str, payload: Dict, delay: float = 0) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, queue, payload, status, visible_at, created_at) VALUES (?, ?, ?, 'ready', ?, ?)",
+                (job_id, queue, json.dumps(payload), now + delay, now)
+            )
+        return job_id
+
+    def lease(self, queue: str, lease_seconds: float) -> Optional[Job]:
+        now = time.time()
+        conn = self._connect()
+        try:
+            # IMMEDIATE takes the write lock up front so two workers can't lease the same row
+            conn.execute("BEGIN IMMEDIATE")
+            while True:
+                row = conn.execute(
+                    "SELECT id, payload, attempts FROM jobs "
+                    "WHERE queue = ? AND status IN ('ready', 'leased') AND visible_at <= ? "
+                    "ORDER BY visible_at LIMIT 1",
+                    (queue, now)
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+
+                job_id, payload, attempts = row
+                if attempts >= self.max_attempts:
+                    # Lease expired too many times (worker crashes): park it
+                    conn.execute("UPDATE jobs SET status = 'dead', lease_token = NULL WHERE id = ?", (job_id,))
+                    continue
+
+                token = uuid.uuid4().hex
+                conn.execute(
+                    "UPDATE jobs SET status = 'leased', attempts = attempts + 1, visible_at = ?, lease_token = ? "
+                    "WHERE id = ?",
+                    (now + lease_seconds, token, job_id)
+                )
+                conn.execute("COMMIT")
+                return Job(job_id, queue, json.loads(payload), attempts + 1, token)
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def ack(self, job: Job):
+        with self._connection() as conn:
+            conn.execute("DELETE FROM jobs WHERE id = ? AND lease_token = ?", (job.id, job.lease_token))
+
+    def fail(self, job: Job, retry_delay: float = 30, retry: bool = True):
+        status = 'ready' if retry and job.attempts < self.max_attempts else 'dead'
+        with self._connection() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, visible_at = ?, lease_token = NULL WHERE id = ? AND lease_token = ?",
+                (status, time.time() + retry_delay, job.id, job.lease_token)
+            )
+
+    def extend(self, job: Job, lease_seconds: float):
+        with self._connection() as conn:
+            conn.execute(
+                "UPDATE jobs SET visible_at = ? WHERE id = ? AND lease_token = ?",
+                (time.time() + lease_seconds, job.id, job.lease_token)
+            )
+
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        counts = {}
+        with self._connection() as conn:
+            for queue, status, count in conn.execute("SELECT queue, status, COUNT(*) FROM jobs GROUP BY queue, status"):
+                counts.setdefault(queue, {})[status] = count
+        return counts
+
+
+# Atomically move the oldest visible job id into the leased state with a new deadline
+_REDIS_LEASE_SCRIPT = """
+local ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, 1)
+if #ids == 0 then return nil end
+redis.call('ZADD', KEYS[1], ARGV[2], ids[1])
+return ids[1]
+"""
+
+
+class RedisJobQueue(JobQueue):
+    """
+    Job queue on any Redis-compatible server. Each queue is a sorted set of
+    job ids scored by the time they become visible; job bodies are hashes.
+    """
+
+    def __init__(self, url: str, max_attempts: int = None, prefix: str = 'linkedin_agent'):
+        super().__init__(max_attempts)
+        try:
+            import redis
+        except ImportError:
+            raise ImportError("The redis package is required for redis:// job queues (pip install redis)")
+        self.redis = redis.Redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+        self._lease_script = self.redis.register_script(_REDIS_LEASE_SCRIPT)
+
+    def _queue_key(self, queue: str) -> str:
+        return f"{self.prefix}:queue:{queue}"
+
+    def _job_key(self, job_id: str) -> str:
+        return f"{self.prefix}:job:{job_id}"
+
+    def enqueue(self, queue: str, payload: Dict, delay: float = 0) -> str:
+        job_id = uuid.uuid4().hex
+        pipe = self.redis.pipeline()
+        pipe.hset(self._job_key(job_id), mapping={'queue': queue, 'payload': json.dumps(payload), 'attempts': 0})
+        pipe.zadd(self._queue_key(queue), {job_id: time.time() + delay})
+        pipe.execute()
+        return job_id
+
+    def lease(self, queue: str, lease_seconds: float) -> Optional[Job]:
+        while True:
+            now = time.time()
+            job_id = self._lease_script(keys=[self._queue_key(queue)], args=[now, now + lease_seconds])
+            if job_id is None:
+                return None
+
+            job_key = self._job_key(job_id)
+            attempts = int(self.redis.hget(job_key, 'attempts') or 0)
+            if attempts >= self.max_attempts:
+                self.redis.zrem(self._queue_key(queue), job_id)
+                self.redis.sadd(f"{self.prefix}:dead:{queue}", job_id)
+                continue
+
+            token = uuid.uuid4().hex
+            self.redis.hset(job_key, mapping={'attempts': attempts + 1, 'lease_token': token})
+            payload = json.loads(self.redis.hget(job_key, 'payload'))
+            return Job(job_id, queue, payload, attempts + 1, token)
+
+    def _owns(self, job: Job) -> bool:
+        return self.redis.hget(self._job_key(job.id), 'lease_token') == job.lease_token
+
+    def ack(self, job: Job):
+        if self._owns(job):
+            pipe = self.redis.pipeline()
+            pipe.zrem(self._queue_key(job.queue), job.id)
+            pipe.delete(self._job_key(job.id))
+            pipe.execute()
+
+    def fail(self, job: Job, retry_delay: float = 30, retry: bool = True):
+        if not self._owns(job):
+            return
+        if not retry or job.attempts >= self.max_attempts:
+            self.redis.zrem(self._queue_key(job.queue), job.id)
+            self.redis.sadd(f"{self.prefix}:dead:{job.queue}", job.id)
+        else:
+            self.redis.zadd(self._queue_key(job.queue), {job.id: time.time() + retry_delay})
+
+    def extend(self, job: Job, lease_seconds: float):
+        if self._owns(job):
+            self.redis.zadd(self._queue_key(job.queue), {job.id: time.time() + lease_seconds}, xx=True)
+
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        counts = {}
+        for key in self.redis.scan_iter(f"{self.prefix}:queue:*"):
+            queue = key.rsplit(':', 1)[-1]
+            counts.setdefault(queue, {})['pending'] = self.redis.zcard(key)
+        for key in self.redis.scan_iter(f"{self.prefix}:dead:*"):
+            queue = key.rsplit(':', 1)[-1]
+            counts.setdefault(queue, {})['dead'] = self.redis.scard(key)
+        return counts
+
+
+def get_job_queue(url: str = None) -> JobQueue:
+    """Create a job queue from a URL: sqlite:///path/to/jobs.db or redis://host:port/db"""
+    url = url or os.getenv('JOB_QUEUE_URL', DEFAULT_QUEUE_URL)
+    parsed = urlparse(url)
+    if parsed.scheme == 'sqlite':
+        path = url[len('sqlite:///'):] if url.startswith('sqlite:///') else parsed.path
+        return SQLiteJobQueue(path or 'jobs.db')
+    if parsed.scheme in ('redis', 'rediss', 'unix'):
+        return RedisJobQueue(url)
+    raise ValueError(f"Unsupported job queue URL: {url}")
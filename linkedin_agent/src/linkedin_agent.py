@@ -1,23 +1,41 @@
 import os
 import time
 from datetime import datetime, timedelta
+from itertools import zip_longest
 from typing import Dict, List
 import requests
 from linkedin_api import Linkedin
 from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
 from dotenv import load_dotenv
 from auth_manager import authenticate, LinkedInAuthManager
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+from post_validator import (
+    validate_post, repair_post, correction_prompt, stream_violation, complete_lines, strip_markdown, RegenerationBudget
+)
+from browser_profiles import get_browser_profile
+from feed_scrapers import create_feed_scraper, targeted_urls, FEED_URL, POST_SELECTOR
 import google.generativeai as genai
+from model_router import ModelRouter
+from post_record import Post
+from media_uploader import MediaUploader
+from archive import ContentArchive
+from content_sources import SourceIngestor
+from filter_pipeline import FilterPipeline
+from run_budget import RunBudget, BudgetExceeded
+from draft_queue import DraftQueue
+from log_setup import log_context
+
+# Fixed timeout for the ugcPosts call: a short one only turns a slow publish into a "maybe published"
+PUBLISH_TIMEOUT = int(os.getenv('PUBLISH_TIMEOUT', 60))
+
+# Outcome of the last create_post: a rejected post certainly did not go out, an uncertain one may have
+PUBLISHED, REJECTED, UNCERTAIN = 'published', 'rejected', 'uncertain'
 
 class LinkedInAgent:
-    def __init__(self):
+    def __init__(self, use_gemini: bool = True, use_browser: bool = True):
+        """
+        Worker processes only set up what their role needs: publishers skip
+        both Gemini and Chrome, generators skip Chrome.
+        """
         load_dotenv()
         self.auth_manager = LinkedInAuthManager()
         credentials = self.auth_manager.get_credentials()
@@ -34,6 +52,7 @@ class LinkedInAgent:
             'Authorization': f'Bearer {self.access_token}',
             'Content-Type': 'application/json'
         }
+        self.media_uploader = MediaUploader(self.headers, f"urn:li:person:{self.personal_profile_id}")
         
         # Define data science related keywords and topics
         self.primary_keywords = [
@@ -64,8 +83,26 @@ class LinkedInAgent:
             'released', 'announced', 'introducing', 'new version', 'latest'
         ]
         
-        self.setup_gemini()
-        self.setup_browser()
+        self.relevance_filter = self.build_relevance_filter()
+        self.regeneration_budget = RegenerationBudget()
+        self.budget = RunBudget()
+        self.router = None
+        self.scraper = None
+        self.semantic_filter = None
+        self.use_browser = use_browser
+        self.ingestor = SourceIngestor()
+        self.drafts = DraftQueue()
+        self.last_publish = None
+        self.archive = ContentArchive() if os.getenv('ARCHIVE_ENABLED', '1').lower() in ('1', 'true', 'yes') else None
+        
+        if use_gemini:
+            self.setup_gemini()
+            self.router.budget = self.budget
+        if os.getenv('SEMANTIC_FILTER', '').lower() in ('1', 'true', 'yes'):
+            self.setup_semantic_filter()
+        # With content sources configured, Chrome is only launched if they come up short
+        if use_browser and not self.ingestor.sources:
+            self.setup_browser()
 
     def setup_credentials(self):
         """Initialize credentials using OAuth authentication"""
@@ -92,22 +129,20 @@ class LinkedInAgent:
             raise ValueError("Missing Google API key in environment variables")
         
         genai.configure(api_key=self.gemini_api_key)
-        self.model = genai.GenerativeModel('gemini-1.5-pro-001')
+        self.router = ModelRouter()
+        self.model = self.router.model_for('draft')
+
+    def setup_semantic_filter(self):
+        """Initialize the optional embedding-based relevance filter"""
+        # Imported lazily so NumPy is only needed when the filter is enabled
+        from semantic_filter import SemanticFilter
+        
+        if os.getenv('SEMANTIC_EMBEDDER', 'gemini') == 'gemini':
+            genai.configure(api_key=os.getenv('GOOGLE_API_KEY'))
+        self.semantic_filter = SemanticFilter()
 
     def setup_browser(self):
         """Initialize browser for scraping with authentication"""
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        
-        service = Service(ChromeDriverManager().install())
-        self.browser = webdriver.Chrome(service=service, options=chrome_options)
-        
-        # Login to LinkedIn
-        self.browser.get('https://www.linkedin.com/login')
-        time.sleep(2)
-        
         # Get LinkedIn credentials from environment variables
         email = os.getenv('LINKEDIN_EMAIL')
         password = os.getenv('LINKEDIN_PASSWORD')
@@ -115,86 +150,141 @@ class LinkedInAgent:
         if not email or not password:
             raise ValueError("LinkedIn credentials not found in environment variables")
         
-        # Find and fill email field
-        email_field = self.browser.find_element(By.ID, 'username')
-        email_field.send_keys(email)
-        
-        # Find and fill password field
-        password_field = self.browser.find_element(By.ID, 'password')
-        password_field.send_keys(password)
+        # SCRAPER_BACKEND picks Selenium (default) or the chromedriver-free CDP engine
+        self.scraper = create_feed_scraper(profile=get_browser_profile())
         
-        # Click sign in button
-        sign_in_button = self.browser.find_element(By.CLASS_NAME, 'login__form_action_container')
-        sign_in_button.click()
-        
-        # Wait for login to complete
-        time.sleep(5)
+        # Login to LinkedIn
+        try:
+            self.scraper.login(email, password)
+        except Exception:
+            self.close()
+            raise
+
+    def start_run(self, deadline_seconds: float = None):
+        """Fresh regeneration allowance and time/token/call budget for a run (or worker job)"""
+        self.regeneration_budget = RegenerationBudget()
+        self.budget = RunBudget(deadline_seconds=deadline_seconds)
+        if self.router is not None:
+            self.router.budget = self.budget
+
+    def _archive(self, kind: str, data, meta: Dict = None):
+        """Record raw inputs/outputs for debugging and replay; never fails the run"""
+        if self.archive is None:
+            return
+        try:
+            self.archive.put(kind, data, meta)
+        except Exception as e:
+            print(f"Error archiving {kind}: {str(e)}")
+
+    def keyword_sets(self) -> Dict[str, List[str]]:
+        """Keyword lists used for relevance filtering and candidate scoring"""
+        return {
+            'primary': self.primary_keywords,
+            'secondary': self.secondary_keywords,
+            'technical': self.technical_indicators
+        }
 
     def is_relevant_data_science_content(self, content: str, author: str) -> bool:
         """
         Check if the content is relevant to data science tools and technologies
         """
-        content_lower = content.lower()
+        return self.is_relevant_post(Post(content, author))
+
+    def build_relevance_filter(self) -> FilterPipeline:
+        """
+        Relevance checks as a short-circuiting cascade; the pipeline re-orders
+        them by measured cost and rejection rate. Further checks can be added
+        with self.relevance_filter.add_stage(name, predicate).
+        """
+        pipeline = FilterPipeline(stats_path=os.getenv('FILTER_STATS_FILE', '.filter_stats.json'))
         
-        # Check for excluded topics first
-        if any(keyword in content_lower for keyword in self.excluded_keywords):
-            return False
-            
-        # Must contain at least one primary keyword
-        has_primary = any(keyword in content_lower for keyword in self.primary_keywords)
+        # Content should be substantial (at least 100 characters)
+        pipeline.add_stage('length', lambda post: len(post.content) >= 100, cost_hint=1e-7)
         
-        # Should contain specific tool mentions or technical depth
-        has_secondary = any(keyword in content_lower for keyword in self.secondary_keywords)
+        # Skip excluded topics (hiring, visas, course selling)
+        pipeline.add_stage(
+            'excluded', lambda post: not post.match_keywords({'excluded': self.excluded_keywords})['excluded']
+        )
         
-        # Content should be substantial (at least 100 characters)
-        is_substantial = len(content) >= 100
+        # Must contain at least one primary keyword
+        pipeline.add_stage('primary', lambda post: post.match_keywords({'primary': self.primary_keywords})['primary'])
         
-        # Check for technical indicators
-        is_technical = any(indicator in content_lower for indicator in self.technical_indicators)
+        # Should contain specific tool mentions or technical depth
+        pipeline.add_stage('depth', lambda post: (
+            post.match_keywords({'secondary': self.secondary_keywords})['secondary']
+            or post.match_keywords({'technical': self.technical_indicators})['technical']
+        ), cost_hint=2e-6)
         
-        # Return True if content meets our quality criteria
-        # Now requiring either (primary + secondary) OR (primary + technical indicator)
-        return is_substantial and has_primary and (has_secondary or is_technical)
+        pipeline.load_stats()
+        return pipeline
 
-    def scrape_trending_posts(self, num_posts: int = 10) -> List[Dict]:
-        """Scrape trending posts using web scraping since API access is limited"""
+    def is_relevant_post(self, post: Post) -> bool:
+        """Relevance check on a Post record, reusing its precomputed text and keyword hits"""
+        return self.relevance_filter.evaluate(post)
+
+    def scrape_trending_posts(self, num_posts: int = 10) -> List[Post]:
+        """
+        Scrape trending posts using web scraping since API access is limited.
+        With SCRAPER_HASHTAGS or SCRAPER_SEARCH_QUERIES set, the feed and those
+        pages are scraped in parallel tabs and merged.
+        """
         try:
-            # Use selenium to scrape LinkedIn feed
-            self.browser.get('https://www.linkedin.com/feed/')
-            wait = WebDriverWait(self.browser, 10)
-            
-            # Wait for feed to load and scroll to load more posts
-            wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, 'div.feed-shared-update-v2')))
+            targets = targeted_urls()
+            if targets:
+                pages = self.scraper.scrape_pages(
+                    [FEED_URL] + targets,
+                    scrolls=self.budget.scale(int(os.getenv('SCRAPER_TAB_SCROLLS', 3))),
+                    max_tabs=int(os.getenv('SCRAPER_MAX_TABS', 4)),
+                    with_source=self.archive is not None
+                )
+            else:
+                # Wait for feed to load and scroll to load more posts
+                self.scraper.open(FEED_URL, wait_selector=POST_SELECTOR)
+                
+                # Scroll more times to find quality content, fewer when the run budget is running out
+                self.scraper.scroll(self.budget.scale(5))  # Increased from 3 to 5 scrolls
+                
+                # One in-page extraction call returns every post on the page
+                pages = [{
+                    'url': FEED_URL,
+                    'posts': self.scraper.extract_posts(),
+                    'page_source': self.scraper.page_source() if self.archive is not None else None
+                }]
             
-            # Scroll more times to find quality content
-            for _ in range(5):  # Increased from 3 to 5 scrolls
-                self.browser.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(2)
+            for page in pages:
+                if page['page_source']:
+                    self._archive('page_source', page['page_source'], {'url': page['url']})
+                page['source'] = ('linkedin_feed' if page['url'] == FEED_URL
+                                  else 'linkedin_hashtag' if '/hashtag/' in page['url'] else 'linkedin_search')
             
-            posts = self.browser.find_elements(By.CSS_SELECTOR, 'div.feed-shared-update-v2')
+            # Interleave pages so every target contributes before num_posts is reached
+            records = [
+                (page['source'], record)
+                for round_ in zip_longest(*(page['posts'] for page in pages))
+                for page, record in zip(pages, round_) if record
+            ]
             trending_posts = []
+            seen = set()
             
-            for post in posts:
-                try:
-                    content = self._extract_post_content(post)
-                    author = self._extract_post_author(post)
-                    
-                    if content and self.is_relevant_data_science_content(content, author):
-                        post_data = {
-                            'content': content,
-                            'author': author,
-                            'timestamp': time.time()
-                        }
-                        trending_posts.append(post_data)
-                        print(f"Found relevant data science post by {author}")
-                        
-                        # Break if we have enough quality posts
-                        if len(trending_posts) >= num_posts:
-                            break
-                            
-                except Exception as e:
-                    print(f"Error processing post: {str(e)}")
+            # One seen-set across all pages: the same post often shows up in the feed and a hashtag page
+            for source, record in records:
+                post = Post(record['content'], record['author'], urn=record.get('urn'), source=source)
+                if post.id in seen:
                     continue
+                seen.add(post.id)
+                self._archive('post', post.to_dict(), {'id': post.id})
+                
+                if self.is_relevant_post(post):
+                    trending_posts.append(post)
+                    print(f"Found relevant data science post by {post.author}")
+                    
+                    # Break if we have enough quality posts; with the semantic filter
+                    # on, keyword matching is only a prefilter so keep every survivor
+                    if len(trending_posts) >= num_posts and not self.semantic_filter:
+                        break
+            
+            if self.semantic_filter and trending_posts:
+                trending_posts = self.semantic_filter.select(trending_posts, top_k=num_posts)
                     
             print(f"Found {len(trending_posts)} relevant data science posts")
             return trending_posts
@@ -203,50 +293,82 @@ class LinkedInAgent:
             print(f"Error fetching feed: {str(e)}")
             return []
 
-    def _extract_post_content(self, post) -> str:
-        """Extract content from a post with multiple selector attempts"""
-        content_selectors = [
-            'span.break-words',
-            'div.feed-shared-text',
-            'div.feed-shared-text-view',
-            'div.feed-shared-update-v2__description-wrapper'
-        ]
+    def fetch_source_posts(self, num_posts: int = 10) -> List[Post]:
+        """Relevant posts from the configured RSS/Atom/arXiv/listing sources"""
+        try:
+            posts = []
+            seen = set()
+            for post in self.ingestor.fetch_posts(timeout=self.budget.remaining_seconds()):
+                if post.id in seen:
+                    continue
+                seen.add(post.id)
+                self._archive('post', post.to_dict(), {'id': post.id})
+                if self.is_relevant_post(post):
+                    posts.append(post)
+            posts = self._unused(posts)
+            
+            if self.semantic_filter and posts:
+                posts = self.semantic_filter.select(posts, top_k=num_posts)
+            
+            print(f"Found {len(posts)} relevant posts from {len(self.ingestor.sources)} content sources")
+            return posts
+            
+        except Exception as e:
+            print(f"Error fetching content sources: {str(e)}")
+            return []
+
+    def collect_posts(self, num_posts: int = 10) -> List[Post]:
+        """
+        Candidate posts for this run: content sources first, topped up from the
+        LinkedIn feed only when they yield fewer than num_posts relevant posts.
+        Posts that were already drafted or published are left out, since cached
+        source entries come back on every run until they age out.
+        """
+        posts = self.fetch_source_posts(num_posts) if self.ingestor.sources else []
+        if len(posts) >= num_posts or not self.use_browser:
+            return posts
         
-        for selector in content_selectors:
-            try:
-                content_elem = post.find_element(By.CSS_SELECTOR, selector)
-                content = content_elem.text
-                if content:
-                    return content
-            except:
-                continue
-        return None
-
-    def _extract_post_author(self, post) -> str:
-        """Extract author from a post with multiple selector attempts"""
-        author_selectors = [
-            'span.feed-shared-actor__name',
-            'span.update-components-actor__name',
-            'a.app-aware-link span'
-        ]
+        # Launching and scrolling Chrome is the slowest step; skip it on a tight budget
+        if self.budget.exhausted() or (posts and self.budget.is_low()):
+            print(f"Skipping feed scraping, run budget is low ({self.budget.summary()})")
+            return posts
         
-        for selector in author_selectors:
+        if self.scraper is None:
             try:
-                author_elem = post.find_element(By.CSS_SELECTOR, selector)
-                author = author_elem.text
-                if author:
-                    return author
-            except:
-                continue
-        return "Unknown Author"
-
-    def analyze_post(self, post_content: str) -> str:
+                self.setup_browser()
+            except Exception as e:
+                print(f"Error starting browser for feed scraping: {str(e)}")
+                return posts
+        seen = {post.id for post in posts}
+        posts.extend(
+            post for post in self._unused(self.scrape_trending_posts(num_posts - len(posts))) if post.id not in seen
+        )
+        return posts
+
+    def _unused(self, posts: List[Post]) -> List[Post]:
+        """Posts whose content has not been drafted or published before"""
+        fresh = [post for post in posts if not self.drafts.has_source(post.content_hash)]
+        if len(fresh) < len(posts):
+            print(f"Skipped {len(posts) - len(fresh)} posts that were already used")
+        return fresh
+
+    def analyze_post(self, post_content: str, on_progress=None) -> str:
         """
         Analyze post content using Google Gemini API and generate a new version
-        that is more descriptive and includes relevant hashtags
+        that is more descriptive and includes relevant hashtags. On a low run
+        budget a compact prompt and a shorter input excerpt are used.
+        
+        With GEMINI_STREAM on (default) the draft is streamed: on_progress(chunk,
+        total_chars) sees every chunk, and generation is cancelled as soon as the
+        text is clearly too long or off-format.
         """
         try:
-            prompt = """You are a professional data science technology writer for LinkedIn. Create engaging, well-formatted posts about data science tools, technologies, and practical insights following these strict guidelines:
+            compact = self.budget.is_low()
+            if compact:
+                prompt = """Rewrite this as a LinkedIn post about the data science tool or technique it covers: a headline with 2 emojis, two short paragraphs, • bullet points for key details, a practical tip, then 3-4 hashtags on the last line. No asterisks, at most 1300 characters.
+            """
+            else:
+                prompt = """You are a professional data science technology writer for LinkedIn. Create engaging, well-formatted posts about data science tools, technologies, and practical insights following these strict guidelines:
 
             1. Post Structure:
                - Start with a compelling headline about a specific tool or technology
@@ -280,58 +402,126 @@ class LinkedInAgent:
 
             # Clean up the input content
             cleaned_content = post_content.replace('**', '').replace('*', '').replace('#', '')
+            if compact:
+                cleaned_content = cleaned_content[:1500]
             
-            response = self.model.generate_content(prompt + "\n\n" + cleaned_content)
-            
-            if response.text:
-                # Clean up formatting
-                final_content = response.text.strip()
-                
-                # Replace any remaining asterisks with bullet points
-                final_content = final_content.replace('* ', '• ')
-                final_content = final_content.replace('**', '')
-                final_content = final_content.replace('*', '')
-                
-                # Ensure proper spacing
-                final_content = final_content.replace('\n\n\n', '\n\n')
-                
-                # Ensure hashtags are properly formatted and at the end
-                lines = final_content.split('\n')
-                content_lines = []
-                hashtags = []
-                
-                for line in lines:
-                    if line.strip().startswith('#'):
-                        # Collect hashtags
-                        tags = line.strip().split()
-                        hashtags.extend([tag for tag in tags if tag.startswith('#')])
-                    else:
-                        # Clean up any remaining asterisks in the line
-                        cleaned_line = line.replace('**', '').replace('*', '')
-                        if cleaned_line.strip():
-                            content_lines.append(cleaned_line)
-                
-                # Reconstruct the post with proper spacing and hashtags at the end
-                final_content = '\n'.join(content_lines).strip()
-                if hashtags:
-                    final_content += '\n\n' + ' '.join(hashtags[:4])  # Limit to 4 hashtags
-                
-                return final_content
+            if os.getenv('GEMINI_STREAM', '1').lower() in ('1', 'true', 'yes'):
+                response = self.router.generate_stream(
+                    'draft', prompt + "\n\n" + cleaned_content,
+                    on_chunk=on_progress, should_abort=stream_violation
+                )
+                if response.aborted:
+                    # Keep the complete lines; repair or a correction prompt handles the rest
+                    print(f"Stopped generation early ({response.aborted}) after {len(response.text)} characters")
+                    response.text = complete_lines(response.text)
             else:
+                response = self.router.generate('draft', prompt + "\n\n" + cleaned_content)
+            
+            if not response.text:
                 print("Gemini API returned empty response")
                 return None
 
+            final_content = self._enforce_post_contract(self._clean_generated_text(response.text))
+            self._archive('generation', {
+                'input': post_content,
+                'raw': response.text,
+                'final': final_content
+            }, {'model': self.router.stage_models['draft'], 'accepted': final_content is not None,
+                'aborted': getattr(response, 'aborted', None)})
+            return final_content
+
+        except BudgetExceeded as e:
+            print(f"Skipping generation: {str(e)}")
+            return None
         except Exception as e:
             print(f"Error in analyzing post: {str(e)}")
             return None
 
-    def create_post(self, content: str) -> bool:
-        """Create a new post on LinkedIn using the basic post API"""
+    def _clean_generated_text(self, text: str) -> str:
+        """Normalise Gemini output: bullets instead of asterisks, hashtags at the end"""
+        # Clean up formatting; a "## Headline" keeps its text, code fences go
+        final_content = strip_markdown(text).strip()
+        
+        # Replace any remaining asterisks with bullet points
+        final_content = final_content.replace('* ', '• ')
+        final_content = final_content.replace('**', '')
+        final_content = final_content.replace('*', '')
+        
+        # Ensure proper spacing
+        final_content = final_content.replace('\n\n\n', '\n\n')
+        
+        # Ensure hashtags are properly formatted and at the end
+        lines = final_content.split('\n')
+        content_lines = []
+        hashtags = []
+        
+        for line in lines:
+            if line.strip().startswith('#'):
+                # Collect hashtags
+                tags = line.strip().split()
+                hashtags.extend([tag for tag in tags if tag.startswith('#')])
+            else:
+                # Clean up any remaining asterisks in the line
+                cleaned_line = line.replace('**', '').replace('*', '')
+                if cleaned_line.strip():
+                    content_lines.append(cleaned_line)
+        
+        # Reconstruct the post with proper spacing and hashtags at the end
+        final_content = '\n'.join(content_lines).strip()
+        if hashtags:
+            final_content += '\n\n' + ' '.join(hashtags[:4])  # Limit to 4 hashtags
+        
+        return final_content
+
+    def _enforce_post_contract(self, content: str) -> str:
+        """
+        Validate generated content, repairing it locally where possible and
+        otherwise regenerating with a short correction prompt within budget.
+        Returns None if the post still violates the contract.
+        """
+        self.regeneration_budget.start_post()
+        keywords = self.primary_keywords + self.secondary_keywords
+
+        while True:
+            violations = validate_post(content)
+            if not violations:
+                return content
+
+            content = repair_post(content, keywords)
+            violations = validate_post(content)
+            if not violations:
+                return content
+
+            if not self.regeneration_budget.can_retry() or self.budget.is_low():
+                print(f"Discarding generated post, unresolved violations: {', '.join(violations)}")
+                return None
+
+            print(f"Regenerating post to fix: {', '.join(violations)}")
+            self.regeneration_budget.consume()
+            response = self.router.generate('repair', correction_prompt(content, violations))
+            content = self._clean_generated_text(response.text) if response.text else ''
+
+    def create_post(self, content: str, media_paths: List[str] = None, media_title: str = None) -> bool:
+        """
+        Create a new post on LinkedIn using the basic post API, optionally with
+        images or a video (defaults to the files in POST_MEDIA_PATHS).
+        last_publish tells a definite rejection (nothing sent, or a 4xx) apart
+        from a failure after which the post may still be live (timeout, 5xx).
+        """
+        self.last_publish = REJECTED
         try:
+            if not self.budget.can_afford(seconds=PUBLISH_TIMEOUT, api_calls=1):
+                print(f"Not publishing, run budget too low for a {PUBLISH_TIMEOUT}s publish ({self.budget.summary()})")
+                return False
+            
             # Ensure the content doesn't exceed LinkedIn's character limit
             if len(content) > 3000:
+                print(f"Post is {len(content)} characters, truncating to LinkedIn's 3000 limit")
                 content = content[:2997] + "..."
 
+            if media_paths is None:
+                media_paths = [path.strip() for path in os.getenv('POST_MEDIA_PATHS', '').split(',') if path.strip()]
+
             url = 'https://api.linkedin.com/v2/ugcPosts'
             post_data = {
                 "author": f"urn:li:person:{self.personal_profile_id}",
@@ -349,13 +539,38 @@ class LinkedInAgent:
                 }
             }
 
-            response = requests.post(url, headers=self.headers, json=post_data)
-            if response.status_code in [201, 200]:
-                print(f"Successfully created post at {datetime.now()}")
-                return True
-            else:
+            # A second attempt re-uploads cached media, in case LinkedIn no longer accepts a cached asset
+            for attempt in range(2):
+                uploads = []
+                if media_paths:
+                    category, media, uploads = self.media_uploader.build_media_entries(media_paths, media_title)
+                    share_content = post_data["specificContent"]["com.linkedin.ugc.ShareContent"]
+                    share_content["shareMediaCategory"] = category
+                    share_content["media"] = media
+
+                self.last_publish = UNCERTAIN
+                response = requests.post(url, headers=self.headers, json=post_data, timeout=PUBLISH_TIMEOUT)
+                # Each real upload is two calls (register + upload); cached assets cost nothing
+                self.budget.charge(api_calls=1 + 2 * sum(not upload['cached'] for upload in uploads))
+                if response.status_code in [201, 200]:
+                    print(f"Successfully created post at {datetime.now()}")
+                    self.last_publish = PUBLISHED
+                    return True
+                
                 print(f"Failed to create post: {response.text}")
-                return False
+                # Only a 4xx rejection means the post was certainly not created
+                if not 400 <= response.status_code < 500:
+                    return False
+                self.last_publish = REJECTED
+                cached_assets = [upload['asset'] for upload in uploads if upload['cached']]
+                if attempt > 0 or not cached_assets:
+                    return False
+                if not self.budget.can_afford(seconds=PUBLISH_TIMEOUT, api_calls=1 + 2 * len(cached_assets)):
+                    print(f"Not retrying with fresh media uploads, run budget spent ({self.budget.summary()})")
+                    return False
+                print(f"Retrying with {len(cached_assets)} cached media assets uploaded again")
+                for asset in cached_assets:
+                    self.media_uploader.forget(asset)
 
         except Exception as e:
             print(f"Error in creating post: {str(e)}")
@@ -366,31 +581,140 @@ class LinkedInAgent:
         Main execution method for the LinkedIn agent
         """
         try:
+            # Fresh regeneration allowance and time/token/call budget for this run
+            self.start_run()
+            
             # Get trending posts
-            trending_posts = self.scrape_trending_posts(
-                num_posts=int(os.getenv('POSTS_PER_FETCH', 10))
-            )
+            with log_context(stage='scrape'):
+                trending_posts = self.collect_posts(
+                    num_posts=self.budget.scale(int(os.getenv('POSTS_PER_FETCH', 10)))
+                )
+
+            # Triage with the cheap stage so only the best candidates reach the draft model
+            with log_context(stage='triage'):
+                selected_posts = self.router.select_candidates(
+                    trending_posts,
+                    self.keyword_sets(),
+                    top_k=self.budget.scale(int(os.getenv('POSTS_PER_RUN', 1)))
+                )
 
-            for post in trending_posts:
+            for index, post in enumerate(selected_posts):
+                if self.budget.exhausted():
+                    print(f"Run budget spent after {index} of {len(selected_posts)} posts ({self.budget.summary()})")
+                    break
+                
                 # Analyze and generate new post content
-                new_content = self.analyze_post(post['content'])
+                with log_context(stage='generate'):
+                    new_content = self.analyze_post(post.content)
                 
                 if new_content:
                     # Create new post
-                    success = self.create_post(new_content)
+                    with log_context(stage='publish'):
+                        success = self.create_post(new_content)
                     
                     if success:
                         print(f"Successfully reposted content at {datetime.now()}")
                     else:
                         print(f"Failed to create post at {datetime.now()}")
+                    if self.last_publish != REJECTED:
+                        # Possibly live posts count as used too, so their source is not posted again
+                        self.drafts.record_published(new_content, post)
                     
-                    # Wait between posts to avoid rate limiting
-                    time.sleep(60)  # 1-minute delay between posts
+                    # Wait between posts to avoid rate limiting, but not past the deadline
+                    if index < len(selected_posts) - 1:
+                        time.sleep(min(60, self.budget.remaining_seconds()))  # 1-minute delay between posts
 
         except Exception as e:
             print(f"Error in agent execution: {str(e)}")
         finally:
-            self.browser.quit()
+            self.finish_run()
+
+    def prepare_drafts(self, count: int = None, deadline_seconds: float = None) -> int:
+        """
+        Pre-generation ahead of a slot: scrape, rank and draft posts into the
+        ready queue until it holds count fresh drafts (PREGENERATE_DRAFTS).
+        Returns the number of drafts added.
+        """
+        count = count or int(os.getenv('PREGENERATE_DRAFTS', 2))
+        added = 0
+        try:
+            self.start_run(deadline_seconds)
+            needed = count - self.drafts.ready_count()
+            if needed <= 0:
+                print(f"{count} fresh drafts already ready, nothing to pre-generate")
+                return 0
+            
+            with log_context(stage='scrape'):
+                candidates = self.collect_posts(num_posts=self.budget.scale(int(os.getenv('POSTS_PER_FETCH', 10))))
+            
+            with log_context(stage='triage'):
+                selected_posts = self.router.select_candidates(candidates, self.keyword_sets(), top_k=needed)
+            
+            for post in selected_posts:
+                if self.budget.exhausted():
+                    print(f"Run budget spent after {added} drafts ({self.budget.summary()})")
+                    break
+                with log_context(stage='generate'):
+                    new_content = self.analyze_post(post.content)
+                score = self.router.heuristic_score(post, self.keyword_sets())
+                if new_content and self.drafts.add(new_content, post, score):
+                    added += 1
+            
+            print(f"Pre-generated {added} drafts, {self.drafts.ready_count()} ready")
+            return added
+        
+        except Exception as e:
+            print(f"Error pre-generating drafts: {str(e)}")
+            return added
+        finally:
+            self.finish_run()
+
+    def publish_ready_draft(self) -> str:
+        """
+        Publish the best fresh pre-generated draft. Returns None if no draft was
+        ready, otherwise the create_post outcome (PUBLISHED, REJECTED or UNCERTAIN).
+        Only a rejected draft goes back into the queue; after an uncertain
+        publish the post may be live, so the draft is abandoned instead.
+        """
+        self.start_run()
+        draft = self.drafts.claim_best()
+        if draft is None:
+            print("No fresh pre-generated draft ready")
+            return None
+        
+        print(f"Publishing pre-generated draft {draft['id']} ({draft['age_seconds'] / 60:.0f} minutes old)")
+        with log_context(stage='publish'):
+            self.create_post(draft['content'])
+        if self.last_publish == PUBLISHED:
+            self.drafts.mark_published(draft['id'])
+        elif self.last_publish == REJECTED:
+            self.drafts.release(draft['id'])
+        else:
+            print(f"Publish of draft {draft['id']} may have gone out; abandoning it, check LinkedIn")
+            self.drafts.abandon(draft['id'])
+        return self.last_publish
+
+    def finish_run(self):
+        """End-of-run housekeeping and summaries, then shut down the browser"""
+        if self.archive is not None:
+            try:
+                self.archive.enforce_retention()
+            except Exception as e:
+                print(f"Error enforcing archive retention: {str(e)}")
+        self.drafts.purge()
+        if self.relevance_filter.evaluated:
+            self.relevance_filter.save_stats()
+            print("Relevance filter this run:\n" + self.relevance_filter.stats_summary())
+        if self.router and self.router.usage:
+            print("Model usage this run:\n" + self.router.usage_summary())
+        print(f"Run budget used: {self.budget.summary()}")
+        self.close()
+
+    def close(self):
+        """Shut down the scraping browser if one was started"""
+        if self.scraper is not None:
+            self.scraper.close()
+            self.scraper = None
 
 if __name__ == "__main__":
     agent = LinkedInAgent()
@@ -0,0 +1,231 @@
+import atexit
+import contextvars
+import glob
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+_run_id = contextvars.ContextVar('run_id', default=None)
+_stage = contextvars.ContextVar('stage', default=None)
+_listener = None
+_log_file = None
+
+
+def new_run_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+@contextmanager
+def log_context(run_id: str = None, stage: str = None):
+    """Tag every log record emitted inside the block with a run and/or stage ID"""
+    tokens = []
+    if run_id is not None:
+        tokens.append((_run_id, _run_id.set(run_id)))
+    if stage is not None:
+        tokens.append((_stage, _stage.set(stage)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Copies the current run/stage IDs onto the record in the calling thread"""
+
+    def filter(self, record):
+        record.run_id = _run_id.get()
+        record.stage = _stage.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+            'pid': record.process,
+            'run_id': getattr(record, 'run_id', None),
+            'stage': getattr(record, 'stage', None)
+        }
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class SizeAndTimeRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    Rotates when the file exceeds max_bytes or every interval_hours, whichever
+    comes first, and gzips rotated files (linkedin_agent.log.1.gz, ...).
+    """
+
+    def __init__(self, filename, max_bytes: int, backup_count: int, interval_hours: float):
+        # delay: a forked child that never logs doesn't leave an empty file behind
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8', delay=True)
+        self.interval = interval_hours * 3600
+        self.next_rollover = time.time() + self.interval
+        self.namer = lambda name: name + '.gz'
+        self.rotator = self._compress
+
+    @staticmethod
+    def _compress(source, dest):
+        with open(source, 'rb') as f_in, gzip.open(dest, 'wb') as f_out:
+            shutil.copyfileobj(f_in, f_out)
+        os.remove(source)
+
+    def shouldRollover(self, record):
+        if self.interval and time.time() >= self.next_rollover:
+            return True
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        super().doRollover()
+        self.next_rollover = time.time() + self.interval
+
+
+class StreamToLogger:
+    """File-like object that turns print() output into log records"""
+
+    def __init__(self, logger: logging.Logger):
+        self.logger = logger
+        self._buffer = ''
+
+    def write(self, text):
+        self._buffer += text
+        while '\n' in self._buffer:
+            line, self._buffer = self._buffer.split('\n', 1)
+            if line.strip():
+                stripped = line.strip()
+                level = logging.ERROR if stripped.startswith(('Error', 'Failed')) else logging.INFO
+                self.logger.log(level, stripped)
+
+    def flush(self):
+        if self._buffer.strip():
+            self.logger.info(self._buffer.strip())
+        self._buffer = ''
+
+    def isatty(self):
+        return False
+
+
+def _build_handlers(log_file: str):
+    """Rotating JSON file handler, plus a readable console handler when wanted"""
+    os.makedirs(os.path.dirname(log_file) or '.', exist_ok=True)
+    file_handler = SizeAndTimeRotatingFileHandler(
+        log_file,
+        max_bytes=int(float(os.getenv('LOG_MAX_MB', 20)) * 1024 * 1024),
+        backup_count=int(os.getenv('LOG_BACKUP_COUNT', 10)),
+        interval_hours=float(os.getenv('LOG_ROTATE_HOURS', 24))
+    )
+    file_handler.setFormatter(JsonFormatter())
+    handlers = [file_handler]
+
+    console = os.getenv('LOG_CONSOLE')
+    if console == '1' or (console is None and sys.__stdout__.isatty()):
+        console_handler = logging.StreamHandler(sys.__stdout__)
+        console_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+        handlers.append(console_handler)
+    return handlers
+
+
+def child_log_file(log_file: str, pid: int) -> str:
+    """Log file of a forked child: logs/linkedin_agent.log -> logs/linkedin_agent-<pid>.log"""
+    stem, ext = os.path.splitext(log_file)
+    return f"{stem}-{pid}{ext}"
+
+
+def _prune_child_logs(log_file: str):
+    """Delete child logs older than the rotation settings keep the main log for"""
+    keep_seconds = int(os.getenv('LOG_BACKUP_COUNT', 10)) * float(os.getenv('LOG_ROTATE_HOURS', 24)) * 3600
+    if not keep_seconds:
+        return
+    stem, ext = os.path.splitext(log_file)
+    for path in glob.glob(f"{glob.escape(stem)}-[0-9]*{ext}*"):
+        try:
+            if os.path.getmtime(path) < time.time() - keep_seconds:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def setup_logging(log_file: str = 'logs/linkedin_agent.log', capture_print: bool = True):
+    """
+    Configure non-blocking logging: callers only enqueue records, and a
+    QueueListener thread formats them as JSON into a size/time rotating,
+    compressed log file (plus a readable console stream when attached to a
+    terminal or LOG_CONSOLE=1). The queue never crosses a fork: see
+    _after_fork_in_child. Calling it again with another file switches to it.
+    """
+    global _listener, _log_file
+    if _listener is not None:
+        if log_file == _log_file:
+            return
+        shutdown_logging()
+
+    handlers = _build_handlers(log_file)
+    _prune_child_logs(log_file)
+    log_queue = queue.Queue(-1)
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(os.getenv('LOG_LEVEL', 'INFO'))
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    _log_file = log_file
+    atexit.register(shutdown_logging)
+
+    if capture_print:
+        sys.stdout = StreamToLogger(logging.getLogger('linkedin_agent'))
+
+
+def _after_fork_in_child():
+    """
+    A forked child (an agent run or a worker) has a copy of the parent's queue
+    but no listener thread, and the supervisor may kill it at any time. It logs
+    synchronously to its own file instead, so nothing it does (or dies doing)
+    touches the parent's logging, and nothing is lost when it is killed or
+    exits without running atexit handlers. A worker that calls setup_logging
+    afterwards gets its own non-blocking listener as usual.
+    """
+    global _listener, _log_file
+    if _listener is None:
+        return
+    _listener = None
+    _log_file = child_log_file(_log_file, os.getpid())
+    handlers = _build_handlers(_log_file)
+    for handler in handlers:
+        handler.addFilter(ContextFilter())
+    logging.getLogger().handlers[:] = handlers
+    if isinstance(sys.stdout, StreamToLogger):
+        sys.stdout = StreamToLogger(logging.getLogger('linkedin_agent'))
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener, _log_file
+    if _listener is not None:
+        if isinstance(sys.stdout, StreamToLogger):
+            sys.stdout.flush()
+            sys.stdout = sys.__stdout__
+        _listener.stop()
+        _listener = None
+        _log_file = None
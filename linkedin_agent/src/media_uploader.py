@@ -0,0 +1,154 @@
+import hashlib
+import json
+import mimetypes
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+import requests
+
+REGISTER_UPLOAD_URL = 'https://api.linkedin.com/v2/assets?action=registerUpload'
+UPLOAD_MECHANISM = 'com.linkedin.digitalmedia.uploading.MediaUploadHttpRequest'
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# ugcPosts shareMediaCategory and upload recipe per file type
+MEDIA_TYPES = {
+    'image': ('IMAGE', 'urn:li:digitalmediaRecipe:feedshare-image'),
+    'video': ('VIDEO', 'urn:li:digitalmediaRecipe:feedshare-video')
+}
+
+
+def file_sha256(path: str) -> str:
+    """Hash a file in fixed-size chunks so large media never sits in memory"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def media_kind(path: str) -> str:
+    """Return 'image' or 'video' for a media file, based on its MIME type"""
+    mime_type, _ = mimetypes.guess_type(path)
+    kind = (mime_type or '').split('/')[0]
+    if kind not in MEDIA_TYPES:
+        raise ValueError(f"Unsupported media type for {path}: {mime_type}; ugcPosts accepts images and video")
+    return kind
+
+
+class MediaUploader:
+    """
+    Registers and uploads media assets for ugcPosts, remembering the asset URN
+    of every file by content hash so recurring images are uploaded only once.
+    """
+
+    def __init__(self, headers: Dict, owner_urn: str, cache_path: str = None):
+        self.headers = headers
+        self.owner_urn = owner_urn
+        self.cache_path = Path(cache_path or os.getenv('MEDIA_CACHE_FILE', '.linkedin_media_cache.json'))
+        self._cache = None
+
+    def _load_cache(self) -> Dict:
+        if self._cache is None:
+            try:
+                with open(self.cache_path, 'r', encoding='utf-8') as f:
+                    self._cache = json.load(f)
+            except FileNotFoundError:
+                self._cache = {}
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable media cache {self.cache_path}: {str(e)}")
+                self._cache = {}
+        return self._cache
+
+    def _save_cache(self):
+        directory = self.cache_path.parent if str(self.cache_path.parent) else Path('.')
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f'.{self.cache_path.name}.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self._cache, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.cache_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def _register_upload(self, recipe: str) -> Dict:
+        body = {
+            'registerUploadRequest': {
+                'recipes': [recipe],
+                'owner': self.owner_urn,
+                'serviceRelationships': [{
+                    'relationshipType': 'OWNER',
+                    'identifier': 'urn:li:userGeneratedContent'
+                }]
+            }
+        }
+        response = requests.post(REGISTER_UPLOAD_URL, headers=self.headers, json=body, timeout=30)
+        response.raise_for_status()
+        value = response.json()['value']
+        return {
+            'asset': value['asset'],
+            'upload_url': value['uploadMechanism'][UPLOAD_MECHANISM]['uploadUrl']
+        }
+
+    def _upload_file(self, upload_url: str, path: str):
+        upload_headers = {
+            'Authorization': self.headers['Authorization'],
+            'Content-Type': mimetypes.guess_type(path)[0] or 'application/octet-stream',
+            'Content-Length': str(os.path.getsize(path))
+        }
+        # Passing the open file makes requests stream it from disk block by block
+        with open(path, 'rb') as f:
+            response = requests.put(upload_url, headers=upload_headers, data=f, timeout=300)
+        response.raise_for_status()
+
+    def upload(self, path: str) -> Dict:
+        """Upload a media file (or reuse a cached asset) and return {asset, category, cached}"""
+        kind = media_kind(path)
+        category, recipe = MEDIA_TYPES[kind]
+        file_hash = file_sha256(path)
+        cache_key = f"{self.owner_urn}:{file_hash}"
+
+        cache = self._load_cache()
+        cached = cache.get(cache_key)
+        if cached:
+            print(f"Reusing uploaded asset {cached['asset']} for {path}")
+            return {'asset': cached['asset'], 'category': category, 'cached': True}
+
+        registration = self._register_upload(recipe)
+        self._upload_file(registration['upload_url'], path)
+        print(f"Uploaded {path} as {registration['asset']}")
+
+        cache[cache_key] = {
+            'asset': registration['asset'],
+            'category': category,
+            'filename': os.path.basename(path),
+            'uploaded_at': time.time()
+        }
+        self._save_cache()
+        return {'asset': registration['asset'], 'category': category, 'cached': False}
+
+    def forget(self, asset: str):
+        """Drop a cached asset, e.g. after LinkedIn rejects it as expired"""
+        cache = self._load_cache()
+        for key in [key for key, entry in cache.items() if entry['asset'] == asset]:
+            del cache[key]
+        self._save_cache()
+
+    def build_media_entries(self, paths: List[str], title: str = None):
+        """
+        Upload files and return (shareMediaCategory, media list) for a ugcPosts
+        body, plus the upload results so callers can tell cached assets apart
+        """
+        uploads = [self.upload(path) for path in paths]
+        categories = {upload['category'] for upload in uploads}
+        if len(categories) > 1:
+            raise ValueError("A post can contain images or a video, not both")
+        media = []
+        for upload in uploads:
+            entry = {'status': 'READY', 'media': upload['asset']}
+            if title:
+                entry['title'] = {'text': title}
+            media.append(entry)
+        return categories.pop(), media, uploads
@@ -0,0 +1,215 @@
+import json
+import math
+import os
+import re
+import time
+from typing import Callable, Dict, List
+import google.generativeai as genai
+from post_record import Post
+from run_budget import BudgetExceeded
+
+# Approximate list prices in USD per million tokens (input, output), matched by model name prefix
+MODEL_PRICES = {
+    'gemini-1.5-pro': (1.25, 5.00),
+    'gemini-1.5-flash-8b': (0.0375, 0.15),
+    'gemini-1.5-flash': (0.075, 0.30),
+    'gemini-2.0-flash': (0.10, 0.40)
+}
+
+# Stage -> (environment variable, default model). "heuristic" means no LLM call at all.
+STAGE_MODELS = {
+    'triage': ('GEMINI_TRIAGE_MODEL', 'gemini-1.5-flash'),
+    'draft': ('GEMINI_DRAFT_MODEL', 'gemini-1.5-pro-001'),
+    'repair': ('GEMINI_REPAIR_MODEL', 'gemini-1.5-flash')
+}
+
+HEURISTIC_MODEL = 'heuristic'
+
+
+def _price_for(model_name: str):
+    for prefix, price in sorted(MODEL_PRICES.items(), key=lambda item: -len(item[0])):
+        if model_name.startswith(prefix):
+            return price
+    return (0.0, 0.0)
+
+
+class StreamedResponse:
+    """Accumulated result of a streamed generation; exposes .text like a regular response"""
+
+    def __init__(self):
+        self.text = ''
+        self.usage_metadata = None
+        # Violation code the stream was cancelled for, or None if it ran to completion
+        self.aborted = None
+
+
+def _cancel_stream(response):
+    # The SDK has no public cancel; closing the underlying gRPC/REST stream stops generation server-side
+    iterator = getattr(response, '_iterator', None)
+    for method in ('cancel', 'close'):
+        if callable(getattr(iterator, method, None)):
+            getattr(iterator, method)()
+            return
+
+
+class ModelRouter:
+    """
+    Routes each generation stage to its configured Gemini model and keeps
+    per-model latency, token and cost accounting. Cheap models (or the local
+    heuristic) triage candidates so only the chosen few reach the draft model.
+    """
+
+    def __init__(self, stage_models: Dict[str, str] = None):
+        self.stage_models = {
+            stage: os.getenv(env_var, default) for stage, (env_var, default) in STAGE_MODELS.items()
+        }
+        self.stage_models.update(stage_models or {})
+        self._models = {}
+        self.usage = {}
+        # Optional RunBudget charged for every call; set per run by the agent
+        self.budget = None
+
+    def model_for(self, stage: str):
+        """Return the GenerativeModel instance configured for a stage"""
+        model_name = self.stage_models[stage]
+        if model_name not in self._models:
+            self._models[model_name] = genai.GenerativeModel(model_name)
+        return self._models[model_name]
+
+    def _record(self, model_name: str, elapsed: float, response=None, prompt: str = ''):
+        stats = self.usage.setdefault(model_name, {
+            'calls': 0, 'seconds': 0.0, 'input_tokens': 0, 'output_tokens': 0, 'cost_usd': 0.0, 'aborted': 0
+        })
+        stats['calls'] += 1
+        stats['seconds'] += elapsed
+        if getattr(response, 'aborted', None):
+            stats['aborted'] += 1
+
+        usage_metadata = getattr(response, 'usage_metadata', None)
+        if usage_metadata is not None:
+            input_tokens = getattr(usage_metadata, 'prompt_token_count', 0) or 0
+            output_tokens = getattr(usage_metadata, 'candidates_token_count', 0) or 0
+            input_price, output_price = _price_for(model_name)
+            stats['input_tokens'] += input_tokens
+            stats['output_tokens'] += output_tokens
+            stats['cost_usd'] += (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+        else:
+            # Rough estimate (4 characters per token) so failed and cancelled calls still count against the budget
+            input_tokens, output_tokens = len(prompt) // 4, len(getattr(response, 'text', '') or '') // 4
+
+        if self.budget is not None:
+            self.budget.charge(tokens=input_tokens + output_tokens)
+
+    def _check_budget(self, stage: str, prompt: str, kwargs: Dict):
+        if self.budget is not None:
+            if not self.budget.can_afford(tokens=len(prompt) // 4, api_calls=1):
+                raise BudgetExceeded(f"Run budget spent, skipping {stage} call ({self.budget.summary()})")
+            # Never let one call outlive the run deadline
+            remaining = self.budget.remaining_seconds()
+            if remaining != float('inf'):
+                kwargs.setdefault('request_options', {'timeout': max(remaining, 1)})
+
+    def generate(self, stage: str, prompt: str, **kwargs):
+        """Call the stage's model and account for latency, tokens and cost"""
+        model_name = self.stage_models[stage]
+        self._check_budget(stage, prompt, kwargs)
+        start = time.monotonic()
+        response = None
+        try:
+            response = self.model_for(stage).generate_content(prompt, **kwargs)
+            return response
+        finally:
+            self._record(model_name, time.monotonic() - start, response, prompt)
+
+    def generate_stream(self, stage: str, prompt: str, on_chunk: Callable[[str, int], None] = None,
+                        should_abort: Callable[[str], str] = None, **kwargs) -> StreamedResponse:
+        """
+        Stream the stage's output, calling on_chunk(chunk_text, total_chars) as it
+        arrives. should_abort(text_so_far) returning a reason cancels the rest of
+        the generation, so doomed outputs stop costing time and output tokens.
+        """
+        model_name = self.stage_models[stage]
+        self._check_budget(stage, prompt, kwargs)
+        start = time.monotonic()
+        result = StreamedResponse()
+        parts = []
+        try:
+            response = self.model_for(stage).generate_content(prompt, stream=True, **kwargs)
+            for chunk in response:
+                try:
+                    text = chunk.text
+                except ValueError:
+                    continue  # a chunk without text parts, e.g. only a finish reason
+                parts.append(text)
+                result.text = ''.join(parts)
+                if on_chunk:
+                    on_chunk(text, len(result.text))
+                result.aborted = should_abort(result.text) if should_abort else None
+                if result.aborted:
+                    _cancel_stream(response)
+                    break
+            if not result.aborted:
+                result.usage_metadata = getattr(response, 'usage_metadata', None)
+            return result
+        finally:
+            self._record(model_name, time.monotonic() - start, result, prompt)
+
+    def heuristic_score(self, post: Post, keyword_sets: Dict[str, List[str]]) -> float:
+        """Local relevance/quality score, used as the free triage model and as a fallback"""
+        weights = {'primary': 2.0, 'secondary': 1.0, 'technical': 1.0}
+        score = 0.0
+        hits = post.match_keywords(keyword_sets)
+        for name in keyword_sets:
+            score += weights.get(name, 1.0) * min(hits[name], 3)
+        # Reward substance, up to ~1000 characters
+        score += min(len(post.content) / 500, 2.0)
+        score += math.log1p(post.reactions + 2 * post.comments) / 2
+        return score
+
+    def _llm_scores(self, posts: List[Post]) -> List[float]:
+        """Score all candidates with one batched call to the triage model"""
+        candidates = '\n\n'.join(
+            f"[{index}] {post.content[:600]}" for index, post in enumerate(posts)
+        )
+        prompt = (
+            "Rate each numbered LinkedIn post from 0 to 10 for how well it would serve as the basis of a "
+            "practical, technical data science post about a specific tool or technique. "
+            f"Reply with only a JSON array of {len(posts)} numbers, in order.\n\n{candidates}"
+        )
+        response = self.generate('triage', prompt)
+        match = re.search(r'\[[^\]]*\]', response.text or '')
+        scores = json.loads(match.group(0)) if match else []
+        if len(scores) != len(posts):
+            raise ValueError(f"Expected {len(posts)} scores, got {len(scores)}")
+        return [float(score) for score in scores]
+
+    def select_candidates(self, posts: List[Post], keyword_sets: Dict[str, List[str]], top_k: int) -> List[Post]:
+        """Triage scraped candidates and return the top_k best, highest score first"""
+        if len(posts) <= top_k:
+            return list(posts)
+
+        scores = None
+        # A tight budget is better spent on the draft than on LLM triage
+        low_budget = self.budget is not None and self.budget.is_low()
+        if self.stage_models['triage'] != HEURISTIC_MODEL and not low_budget:
+            try:
+                scores = self._llm_scores(posts)
+            except Exception as e:
+                print(f"Triage model failed, falling back to heuristic scoring: {str(e)}")
+        if scores is None:
+            scores = [self.heuristic_score(post, keyword_sets) for post in posts]
+
+        ranked = sorted(zip(scores, range(len(posts))), key=lambda item: -item[0])
+        return [posts[index] for _, index in ranked[:top_k]]
+
+    def usage_summary(self) -> str:
+        """One line per model with calls, latency, tokens and estimated cost"""
+        lines = []
+        for model_name, stats in sorted(self.usage.items()):
+            avg = stats['seconds'] / stats['calls'] if stats['calls'] else 0
+            lines.append(
+                f"{model_name}: {stats['calls']} calls, {avg:.2f}s avg, "
+                f"{stats['input_tokens']} in / {stats['output_tokens']} out tokens, ${stats['cost_usd']:.4f}"
+                + (f", {stats['aborted']} streams aborted" if stats['aborted'] else "")
+            )
+        return '\n'.join(lines)
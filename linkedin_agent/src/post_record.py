@@ -0,0 +1,83 @@
+import hashlib
+import time
+from typing import Dict, List
+
+
+def content_hash(text_lower: str) -> str:
+    """Whitespace-insensitive hash of lowercased post text, used for dedup and caching"""
+    return hashlib.blake2b(' '.join(text_lower.split()).encode('utf-8'), digest_size=16).hexdigest()
+
+
+class Post:
+    """
+    Canonical post record passed between scraper, filter, generator and publisher.
+    Derived fields (lowercase text, content hash, keyword hits) are computed once.
+    """
+
+    __slots__ = (
+        'urn', 'content', 'author', 'timestamp', 'reactions', 'comments', 'source',
+        'text_lower', 'content_hash', 'keyword_hits'
+    )
+
+    # Field order of the compact row form; append new fields at the end
+    ROW_FIELDS = ('urn', 'content', 'author', 'timestamp', 'reactions', 'comments', 'source', 'content_hash')
+
+    def __init__(self, content: str, author: str = 'Unknown Author', urn: str = None, timestamp: float = None,
+                 reactions: int = 0, comments: int = 0, source: str = 'linkedin_feed', hash_: str = None):
+        self.content = content
+        self.author = author
+        self.urn = urn
+        self.timestamp = timestamp if timestamp is not None else time.time()
+        self.reactions = reactions
+        self.comments = comments
+        self.source = source
+        self.text_lower = content.lower()
+        self.content_hash = hash_ or content_hash(self.text_lower)
+        self.keyword_hits = {}
+
+    @property
+    def id(self) -> str:
+        """Stable identifier: the LinkedIn URN when known, otherwise the content hash"""
+        return self.urn or f"hash:{self.content_hash}"
+
+    def match_keywords(self, keyword_sets: Dict[str, List[str]]) -> Dict[str, int]:
+        """Count keyword hits per named set, computing each set only once per post"""
+        hits = {}
+        for name, keywords in keyword_sets.items():
+            # Keyed by the keywords too, so a name reused for another list is not served a stale count
+            key = (name, tuple(keywords))
+            if key not in self.keyword_hits:
+                self.keyword_hits[key] = sum(1 for keyword in keywords if keyword in self.text_lower)
+            hits[name] = self.keyword_hits[key]
+        return hits
+
+    def to_row(self) -> list:
+        """Compact JSON-friendly form for job payloads and on-disk stores"""
+        return [getattr(self, field) for field in self.ROW_FIELDS]
+
+    @classmethod
+    def from_row(cls, row: list) -> 'Post':
+        urn, content, author, timestamp, reactions, comments, source, hash_ = row[:len(cls.ROW_FIELDS)]
+        return cls(content, author, urn=urn, timestamp=timestamp, reactions=reactions,
+                   comments=comments, source=source, hash_=hash_)
+
+    def to_dict(self) -> Dict:
+        return dict(zip(self.ROW_FIELDS, self.to_row()))
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Post':
+        return cls(
+            data['content'], data.get('author', 'Unknown Author'), urn=data.get('urn'),
+            timestamp=data.get('timestamp'), reactions=data.get('reactions', 0),
+            comments=data.get('comments', 0), source=data.get('source', 'linkedin_feed'),
+            hash_=data.get('content_hash')
+        )
+
+    def __eq__(self, other):
+        return isinstance(other, Post) and self.id == other.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __repr__(self):
+        return f"Post(id={self.id!r}, author={self.author!r}, chars={len(self.content)})"
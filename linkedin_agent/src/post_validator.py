@@ -0,0 +1,181 @@
+import os
+import re
+from typing import Dict, List
+
+MAX_POST_LENGTH = 1300
+MIN_HASHTAGS = 3
+MAX_HASHTAGS = 4
+BULLET = '•'
+
+# While streaming, generation is cancelled once the text is this far past the limit
+STREAM_ABORT_LENGTH = int(MAX_POST_LENGTH * float(os.getenv('STREAM_ABORT_LENGTH_FACTOR', 1.3)))
+
+_ALT_BULLET_RE = re.compile(r'^\s*(?:[-–*+]|\d+[.)])\s+')
+_HEADING_RE = re.compile(r'^\s*#{1,6}\s', re.MULTILINE)
+
+
+def split_hashtags(content: str):
+    """Split a post into its body lines and trailing hashtags"""
+    body_lines = []
+    hashtags = []
+    for line in content.strip().split('\n'):
+        stripped = line.strip()
+        if stripped.startswith('#'):
+            hashtags.extend(tag for tag in stripped.split() if tag.startswith('#'))
+        else:
+            body_lines.append(line.rstrip())
+    # Drop blank lines trailing the body
+    while body_lines and not body_lines[-1].strip():
+        body_lines.pop()
+    return body_lines, hashtags
+
+
+def join_post(body_lines: List[str], hashtags: List[str]) -> str:
+    """Reassemble a post with hashtags on their own line at the end"""
+    content = '\n'.join(body_lines).strip()
+    if hashtags:
+        content += '\n\n' + ' '.join(hashtags)
+    return content
+
+
+def validate_post(content: str) -> List[str]:
+    """
+    Check generated content against the post contract.
+    Returns a list of violation codes; an empty list means the post is valid.
+    """
+    if not content or not content.strip():
+        return ['empty']
+
+    violations = []
+    body_lines, hashtags = split_hashtags(content)
+
+    if len(content) > MAX_POST_LENGTH:
+        violations.append('too_long')
+    if not MIN_HASHTAGS <= len(hashtags) <= MAX_HASHTAGS:
+        violations.append('hashtag_count')
+    if not any(line.strip().startswith(BULLET) for line in body_lines):
+        violations.append('no_bullets')
+    if '*' in content:
+        violations.append('asterisks')
+    if '```' in content:
+        violations.append('code_block')
+    return violations
+
+
+def stream_violation(partial: str) -> str:
+    """
+    Check a partially streamed post for violations that neither further output
+    nor local repair can fix. Returns the violation code, or None to keep
+    generating. Headings and code fences are stripped afterwards instead.
+    """
+    if len(partial) > STREAM_ABORT_LENGTH:
+        return 'too_long'
+    _, hashtags = split_hashtags(strip_markdown(partial))
+    if len(hashtags) > 2 * MAX_HASHTAGS:
+        return 'hashtag_count'
+    return None
+
+
+def strip_markdown(content: str) -> str:
+    """Drop code fence lines and turn markdown headings into plain lines"""
+    lines = [line for line in content.split('\n') if not line.strip().startswith('```')]
+    return _HEADING_RE.sub('', '\n'.join(lines))
+
+
+def complete_lines(partial: str) -> str:
+    """Drop the unfinished last line of an aborted stream"""
+    return partial.rsplit('\n', 1)[0] if '\n' in partial else partial
+
+
+def _keyword_hashtag(keyword: str) -> str:
+    return '#' + ''.join(word.capitalize() for word in re.split(r'[^0-9a-zA-Z]+', keyword) if word)
+
+
+def repair_post(content: str, keywords: List[str] = None) -> str:
+    """
+    Apply cheap local fixes for contract violations: normalise bullets and
+    asterisks, dedupe/cap hashtags (topping up from matched keywords), and
+    trim trailing body lines when the post is only slightly over length.
+    """
+    body_lines, hashtags = split_hashtags(content)
+
+    # Bullet and asterisk clean-up
+    has_bullets = any(line.strip().startswith(BULLET) for line in body_lines)
+    fixed_lines = []
+    for line in body_lines:
+        if line.strip().startswith('```'):
+            continue  # code fences have no place in a LinkedIn post
+        if not has_bullets and _ALT_BULLET_RE.match(line):
+            line = _ALT_BULLET_RE.sub(f'{BULLET} ', line, count=1)
+        fixed_lines.append(line.replace('**', '').replace('*', ''))
+    body_lines = fixed_lines
+
+    # Hashtags: dedupe case-insensitively, cap, then top up from keywords
+    seen = set()
+    unique_tags = []
+    for tag in hashtags:
+        tag = tag.replace('*', '')
+        if tag.lower() not in seen and re.match(r'#\w', tag):  # not a bare '#' or a '##' heading marker
+            seen.add(tag.lower())
+            unique_tags.append(tag)
+    hashtags = unique_tags[:MAX_HASHTAGS]
+    if len(hashtags) < MIN_HASHTAGS and keywords:
+        body_lower = '\n'.join(body_lines).lower()
+        for keyword in keywords:
+            tag = _keyword_hashtag(keyword)
+            if re.search(r'\b' + re.escape(keyword) + r'\b', body_lower) and tag.lower() not in seen:
+                seen.add(tag.lower())
+                hashtags.append(tag)
+                if len(hashtags) >= MIN_HASHTAGS:
+                    break
+
+    # Length: drop whole lines from the end of the body, but never gut the post
+    content = join_post(body_lines, hashtags)
+    min_lines = max(3, int(len(body_lines) * 0.6))
+    while len(content) > MAX_POST_LENGTH and len(body_lines) > min_lines:
+        body_lines.pop()
+        while body_lines and not body_lines[-1].strip():
+            body_lines.pop()
+        content = join_post(body_lines, hashtags)
+    return content
+
+
+def correction_prompt(content: str, violations: List[str]) -> str:
+    """Short prompt asking the model to fix only the listed violations"""
+    instructions = {
+        'empty': "Write the post; the previous attempt was empty.",
+        'too_long': f"Shorten it to under {MAX_POST_LENGTH - 100} characters in total.",
+        'hashtag_count': f"End with exactly {MIN_HASHTAGS}-{MAX_HASHTAGS} relevant hashtags on the last line.",
+        'no_bullets': f"Put the key technical details in bullet points starting with '{BULLET}'.",
+        'asterisks': "Do not use asterisks or markdown formatting.",
+        'code_block': "Do not include code blocks; describe the code in words or a bullet point."
+    }
+    fixes = '\n'.join(f"- {instructions[v]}" for v in violations if v in instructions)
+    return (
+        "Revise this LinkedIn post. Keep the topic, tone and structure, and fix only the following:\n"
+        f"{fixes}\n\nReturn only the revised post.\n\n{content}"
+    )
+
+
+class RegenerationBudget:
+    """Bounded retry allowance for corrective regenerations, per post and per run"""
+
+    def __init__(self, per_post: int = None, per_run: int = None):
+        self.per_post = per_post if per_post is not None else int(os.getenv('GENERATION_RETRIES_PER_POST', 2))
+        self.per_run = per_run if per_run is not None else int(os.getenv('GENERATION_RETRIES_PER_RUN', 5))
+        self.used_run = 0
+        self.used_post = 0
+
+    def start_post(self):
+        """Reset the per-post allowance before handling a new post"""
+        self.used_post = 0
+
+    def can_retry(self) -> bool:
+        return self.used_post < self.per_post and self.used_run < self.per_run
+
+    def consume(self):
+        self.used_post += 1
+        self.used_run += 1
+
+    def stats(self) -> Dict:
+        return {'used_run': self.used_run, 'per_run': self.per_run, 'per_post': self.per_post}
@@ -0,0 +1,143 @@
+import cProfile
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+# Settings come from the environment; the scheduler's --profile flag calls configure(enabled=True)
+_settings = {
+    'enabled': os.getenv('AGENT_PROFILE', '').lower() in ('1', 'true', 'yes'),
+    # "cprofile" (deterministic, higher overhead) or "sample" (stack sampling, low overhead)
+    'mode': os.getenv('PROFILE_MODE', 'cprofile'),
+    'sample_interval': float(os.getenv('PROFILE_SAMPLE_INTERVAL', 0.01)),
+    'every_n_runs': int(os.getenv('PROFILE_EVERY_N_RUNS', 1)),
+    'tracemalloc': os.getenv('PROFILE_TRACEMALLOC', '1').lower() in ('1', 'true', 'yes'),
+    'tracemalloc_frames': int(os.getenv('PROFILE_TRACEMALLOC_FRAMES', 5)),
+    'top_n': int(os.getenv('PROFILE_TOP_N', 25)),
+    'output_dir': os.getenv('PROFILE_DIR', 'logs')
+}
+# Runs seen per kind; kept in the scheduling process, since child processes start from a copy
+_run_counter = Counter()
+
+
+def configure(**settings):
+    """Override profiling settings, e.g. configure(enabled=True, mode='sample')"""
+    unknown = set(settings) - set(_settings)
+    if unknown:
+        raise ValueError(f"Unknown profiling settings: {sorted(unknown)}")
+    _settings.update(settings)
+
+
+class StackSampler:
+    """
+    Samples one thread's Python stack at a fixed interval from a background
+    thread and aggregates collapsed stacks (flamegraph.pl / speedscope format).
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path: str):
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def _write_allocation_diff(before, after, path: str, top_n: int):
+    stats = after.compare_to(before, 'lineno')
+    current, peak = tracemalloc.get_traced_memory()
+    with open(path, 'w') as f:
+        f.write(f"Traced memory at end: {current / 1024:.1f} KiB, peak {peak / 1024:.1f} KiB\n")
+        f.write(f"Top {top_n} allocation changes during the run:\n\n")
+        for stat in stats[:top_n]:
+            f.write(f"{stat}\n")
+
+
+def should_profile(kind: str = 'run') -> bool:
+    """
+    Count one run of this kind and decide whether it is profiled (every
+    PROFILE_EVERY_N_RUNS-th). Call it in the long-lived process that starts
+    the runs and pass the result on when runs execute in child processes.
+    """
+    _run_counter[kind] += 1
+    return _settings['enabled'] and _run_counter[kind] % max(_settings['every_n_runs'], 1) == 0
+
+
+@contextmanager
+def profile_run(label: str = 'run', enabled: bool = None):
+    """
+    Profile the wrapped block when profiling is enabled: a cProfile .prof file
+    (or sampled .folded stacks) and a tracemalloc top-N allocation diff,
+    written to logs/ with a timestamped name. A no-op when disabled.
+    enabled is a decision made earlier by should_profile(); by default the
+    run is counted here.
+    """
+    if enabled is None:
+        enabled = should_profile()
+    if not enabled:
+        yield
+        return
+
+    os.makedirs(_settings['output_dir'], exist_ok=True)
+    prefix = os.path.join(_settings['output_dir'], f"profile-{datetime.now():%Y%m%d-%H%M%S}-{label}")
+
+    trace_memory = _settings['tracemalloc'] and not tracemalloc.is_tracing()
+    if trace_memory:
+        tracemalloc.start(_settings['tracemalloc_frames'])
+        before = tracemalloc.take_snapshot()
+
+    profiler = sampler = None
+    if _settings['mode'] == 'sample':
+        sampler = StackSampler(threading.get_ident(), _settings['sample_interval'])
+        sampler.start()
+    else:
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        elapsed = time.monotonic() - start
+        outputs = []
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(prefix + '.prof')
+            outputs.append(prefix + '.prof')
+        if sampler:
+            sampler.stop()
+            sampler.write(prefix + '.folded')
+            outputs.append(prefix + '.folded')
+        if trace_memory:
+            after = tracemalloc.take_snapshot()
+            _write_allocation_diff(before, after, prefix + '-alloc.txt', _settings['top_n'])
+            tracemalloc.stop()
+            outputs.append(prefix + '-alloc.txt')
+        logging.info(f"Profiled {label} in {elapsed:.1f}s: {', '.join(outputs)}")
@@ -0,0 +1,87 @@
+import os
+import time
+from typing import Dict
+
+# Below this share of the budget, stages switch to their cheap mode (heuristic triage, compact prompt)
+LOW_BUDGET_FRACTION = float(os.getenv('RUN_LOW_BUDGET_FRACTION', 0.5))
+
+
+class BudgetExceeded(Exception):
+    """Raised by callers that cannot do any useful work in what is left of the budget"""
+
+
+class RunBudget:
+    """
+    Wall-clock, LLM-token and API-call allowance for one agent run. Stages ask
+    how much is left (fraction_left, scale) and scale their work down, so a
+    slow dependency shortens the run instead of pushing it past its slot.
+    A limit of 0 means unlimited.
+    """
+
+    def __init__(self, deadline_seconds: float = None, max_tokens: int = None, max_api_calls: int = None):
+        self.deadline_seconds = (
+            deadline_seconds if deadline_seconds is not None else float(os.getenv('RUN_DEADLINE_SECONDS', 900))
+        )
+        self.max_tokens = max_tokens if max_tokens is not None else int(os.getenv('RUN_MAX_LLM_TOKENS', 100000))
+        self.max_api_calls = (
+            max_api_calls if max_api_calls is not None else int(os.getenv('RUN_MAX_API_CALLS', 40))
+        )
+        self.started = time.monotonic()
+        self.tokens = 0
+        self.api_calls = 0
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def remaining_seconds(self) -> float:
+        if not self.deadline_seconds:
+            return float('inf')
+        return max(self.deadline_seconds - self.elapsed(), 0.0)
+
+    def fraction_left(self) -> float:
+        """Share of the tightest limit still available, from 1.0 down to 0.0"""
+        fractions = [1.0]
+        if self.deadline_seconds:
+            fractions.append(self.remaining_seconds() / self.deadline_seconds)
+        if self.max_tokens:
+            fractions.append(max(1 - self.tokens / self.max_tokens, 0.0))
+        if self.max_api_calls:
+            fractions.append(max(1 - self.api_calls / self.max_api_calls, 0.0))
+        return min(fractions)
+
+    def exhausted(self) -> bool:
+        return self.fraction_left() <= 0
+
+    def is_low(self) -> bool:
+        return self.fraction_left() < LOW_BUDGET_FRACTION
+
+    def can_afford(self, seconds: float = 0, tokens: int = 0, api_calls: int = 0) -> bool:
+        """True if an operation of the given estimated size still fits the budget"""
+        if self.deadline_seconds and seconds > self.remaining_seconds():
+            return False
+        if self.max_tokens and self.tokens + tokens > self.max_tokens:
+            return False
+        if self.max_api_calls and self.api_calls + api_calls > self.max_api_calls:
+            return False
+        return not self.exhausted()
+
+    def scale(self, full: int, minimum: int = 1) -> int:
+        """Scale a work amount (scrolls, candidates) by the budget left, never below minimum"""
+        return max(minimum, min(full, round(full * self.fraction_left())))
+
+    def charge(self, tokens: int = 0, api_calls: int = 1):
+        self.tokens += tokens
+        self.api_calls += api_calls
+
+    def stats(self) -> Dict:
+        return {
+            'elapsed_seconds': round(self.elapsed(), 1), 'deadline_seconds': self.deadline_seconds,
+            'tokens': self.tokens, 'max_tokens': self.max_tokens,
+            'api_calls': self.api_calls, 'max_api_calls': self.max_api_calls
+        }
+
+    def summary(self) -> str:
+        deadline = f"{self.deadline_seconds:g}s" if self.deadline_seconds else 'unlimited'
+        return (f"{self.elapsed():.0f}s of {deadline}, "
+                f"{self.tokens} of {self.max_tokens or 'unlimited'} LLM tokens, "
+                f"{self.api_calls} of {self.max_api_calls or 'unlimited'} API calls")
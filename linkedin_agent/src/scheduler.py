@@ -1,31 +1,30 @@
+import argparse
 import schedule
+import signal
+import sys
 import time
 import os
 import logging
 from dotenv import load_dotenv
-from linkedin_agent import LinkedInAgent
+from linkedin_agent import LinkedInAgent, PUBLISHED, UNCERTAIN
+from auth_manager import LinkedInAuthManager
+from workers import enqueue_scrape
+from profiling import profile_run, should_profile, configure as configure_profiling
+from supervisor import run_with_limits, reap_orphaned_browsers
+from draft_queue import DraftQueue, lead_minutes, pregeneration_start, pregeneration_timeout
+import log_setup
 from datetime import datetime, timedelta
 
 def setup_logging():
-    """Configure logging to file and console"""
+    """Configure non-blocking, rotating JSON logging to logs/linkedin_agent.log"""
     log_dir = "logs"
     if not os.path.exists(log_dir):
         os.makedirs(log_dir)
         
-    log_file = os.path.join(log_dir, "linkedin_agent.log")
-    
-    # Configure logging
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(log_file),
-            logging.StreamHandler()
-        ]
-    )
+    log_setup.setup_logging(os.path.join(log_dir, "linkedin_agent.log"))
 
-def should_post_now(target_hour: int) -> bool:
-    """Check if we should post now based on the target hour"""
+def already_posted(target_hour: int) -> bool:
+    """Check if today's post for the target hour has already gone out"""
     now = datetime.now()
     last_post_file = f"logs/last_post_{target_hour}.txt"
     
@@ -35,12 +34,20 @@ def should_post_now(target_hour: int) -> bool:
                 last_post_str = f.read().strip()
                 last_post = datetime.fromisoformat(last_post_str)
                 
-                # If last post was today and at/after target hour, skip
-                if (last_post.date() == now.date() and 
-                    last_post.hour >= target_hour):
-                    return False
+                # Last post was today and at/after target hour
+                return (last_post.date() == now.date() and 
+                        last_post.hour >= target_hour)
     except Exception as e:
         logging.warning(f"Error reading last post time: {e}")
+    return False
+
+def should_post_now(target_hour: int) -> bool:
+    """Check if we should post now based on the target hour"""
+    now = datetime.now()
+    
+    # If the post for this slot already went out today, skip
+    if already_posted(target_hour):
+        return False
     
     # Post if current hour is within 2 hours after target hour
     # This allows recovery from short interruptions while preventing duplicate posts
@@ -55,20 +62,111 @@ def record_post(target_hour: int):
     except Exception as e:
         logging.error(f"Error recording post time: {e}")
 
+def check_token_expiry():
+    """Warn ahead of LinkedIn token expiry and refresh it before a scheduled run needs it"""
+    try:
+        auth_manager = LinkedInAuthManager()
+        remaining = auth_manager.seconds_until_expiry()
+        if remaining is None:
+            logging.warning("No LinkedIn session stored; run auth_manager.py interactively before the next slot")
+            return
+
+        warning_days = float(os.getenv('TOKEN_EXPIRY_WARNING_DAYS', 7))
+        if remaining < auth_manager.refresh_margin and auth_manager.can_refresh():
+            if auth_manager.refresh_access_token():
+                remaining = auth_manager.seconds_until_expiry()
+            else:
+                logging.warning("LinkedIn token refresh failed; will retry at the next check")
+
+        if remaining <= 0:
+            logging.error("LinkedIn access token has expired and could not be refreshed")
+        elif remaining < warning_days * 86400:
+            logging.warning(
+                f"LinkedIn access token expires in {remaining / 86400:.1f} days"
+                + ("" if auth_manager.can_refresh() else
+                   " and cannot be refreshed (set LINKEDIN_CLIENT_ID/LINKEDIN_CLIENT_SECRET or re-authenticate)")
+            )
+    except Exception as e:
+        logging.error(f"Error checking LinkedIn token expiry: {e}")
+
+def pregeneration_lead_minutes() -> int:
+    """Minutes before each slot at which drafts are pre-generated; 0 disables pre-generation"""
+    if os.getenv('AGENT_MODE') == 'workers':
+        return 0
+    return lead_minutes()
+
+def _agent_job(target_hour: int = None, profile: bool = False):
+    """Body of one agent run; executed in a supervised child process"""
+    with profile_run(f"slot{target_hour}" if target_hour is not None else "manual", enabled=profile):
+        if pregeneration_lead_minutes() > 0:
+            # Publishing a ready draft needs neither Chrome nor Gemini: one API call
+            try:
+                outcome = LinkedInAgent(use_gemini=False, use_browser=False).publish_ready_draft()
+                if outcome == PUBLISHED:
+                    return
+                if outcome == UNCERTAIN:
+                    # The draft may be live; a second post in the same slot is worse than none
+                    logging.warning("Pre-generated draft may have been published, skipping on-demand generation")
+                    return
+            except Exception as e:
+                logging.error(f"Error publishing pre-generated draft: {str(e)}")
+            logging.info("Falling back to on-demand generation")
+        agent = LinkedInAgent()
+        agent.run()
+
+def _pregenerate_job(target_hour: int, deadline_seconds: float, profile: bool = False):
+    with profile_run(f"pregen{target_hour}", enabled=profile):
+        agent = LinkedInAgent()
+        agent.prepare_drafts(deadline_seconds=deadline_seconds)
+
+def pregenerate(target_hour: int):
+    """Fill the ready queue ahead of a slot, finishing before the slot starts"""
+    with log_setup.log_context(run_id=log_setup.new_run_id()):
+        try:
+            if already_posted(target_hour):
+                return
+            if DraftQueue().ready_count() >= int(os.getenv('PREGENERATE_DRAFTS', 2)):
+                logging.info(f"Enough fresh drafts ready for {target_hour}:00, skipping pre-generation")
+                return
+            
+            # The scheduler loop is blocked while this runs, so it must end before the slot
+            timeout = pregeneration_timeout(pregeneration_lead_minutes())
+            logging.info(f"Pre-generating drafts for {target_hour}:00")
+            outcome = run_with_limits(_pregenerate_job, args=(target_hour, timeout - 60, should_profile('pregenerate')),
+                                      timeout=timeout, label=f"pregenerate-{target_hour}")
+            logging.info(f"Pre-generation for {target_hour}:00 ended with status {outcome['status']} "
+                         f"after {outcome['duration_seconds']}s")
+        except Exception as e:
+            logging.error(f"Error pre-generating drafts: {str(e)}", exc_info=True)
+
 def run_agent(target_hour: int = None):
     """
     Initialize and run the LinkedIn agent
     """
+    with log_setup.log_context(run_id=log_setup.new_run_id()):
+        _run_agent(target_hour)
+
+def _run_agent(target_hour: int = None):
     try:
         # Skip if we shouldn't post now
         if target_hour is not None and not should_post_now(target_hour):
             logging.info(f"Skipping post for {target_hour}:00, already posted or too late")
             return
 
-        logging.info(f"Starting agent run for {target_hour}:00" if target_hour else "Starting agent run")
-        agent = LinkedInAgent()
-        agent.run()
-        logging.info("Agent run completed successfully")
+        if os.getenv('AGENT_MODE') == 'workers':
+            # Scrape/generate/publish happen in the worker pool (workers.py)
+            job_id = enqueue_scrape()
+            logging.info(f"Enqueued scrape job {job_id} for the worker pool")
+        else:
+            logging.info(f"Starting agent run for {target_hour}:00" if target_hour else "Starting agent run")
+            # Isolated child process with a deadline and memory cap, so a hung
+            # browser can't block later slots or leak Chrome processes
+            outcome = run_with_limits(_agent_job, args=(target_hour, should_profile('agent')), label=f"agent-run-{target_hour}")
+            if outcome['status'] != 'ok':
+                logging.error(f"Agent run ended with status {outcome['status']} after {outcome['duration_seconds']}s")
+                return
+            logging.info(f"Agent run completed successfully in {outcome['duration_seconds']}s "
+                         f"(peak {outcome['peak_pss_mb']} MB)")
         
         # Record successful post
         if target_hour is not None:
@@ -94,9 +192,24 @@ def main():
     """
     Main function to schedule and run the LinkedIn agent
     """
+    parser = argparse.ArgumentParser(description="LinkedIn agent scheduler")
+    parser.add_argument('--profile', action='store_true',
+                        help="Profile each agent run (cProfile/tracemalloc output in logs/)")
+    parser.add_argument('--profile-mode', choices=['cprofile', 'sample'], default=None,
+                        help="cprofile (default) or low-overhead stack sampling")
+    args = parser.parse_args()
+
     try:
         load_dotenv()
         setup_logging()
+        if args.profile:
+            configure_profiling(enabled=True)
+        if args.profile_mode:
+            configure_profiling(mode=args.profile_mode)
+        
+        # Turn SIGTERM into a normal exit so in-flight runs get their process tree cleaned up
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        reap_orphaned_browsers()
         
         logging.info("Starting LinkedIn Agent Scheduler (posting twice daily at 10:00 AM and 3:00 PM)")
         
@@ -106,6 +219,17 @@ def main():
         # Schedule afternoon post (3:00 PM)
         schedule.every().day.at("15:00").do(run_agent, target_hour=15)
         
+        # Pre-generate drafts ahead of each slot, so the slot itself only publishes
+        lead = pregeneration_lead_minutes()
+        if lead > 0:
+            for hour in [10, 15]:
+                schedule.every().day.at(pregeneration_start(hour, lead)).do(pregenerate, target_hour=hour)
+            logging.info(f"Pre-generating drafts {lead} minutes before each slot")
+
+        # Keep the LinkedIn token fresh well ahead of the posting slots
+        check_token_expiry()
+        schedule.every(6).hours.do(check_token_expiry)
+        
         # Check for missed posts on startup, but only if within recovery window
         now = datetime.now()
         if now.hour in [10, 11, 15, 16]:  # Only check during recovery windows
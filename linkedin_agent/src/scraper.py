@@ -2,9 +2,10 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
-from typing import Dict, List
+from typing import List
 import time
 import json
+from post_record import Post
 
 class LinkedInScraper:
     def __init__(self, browser):
@@ -16,6 +17,7 @@ class LinkedInScraper:
             'big data', 'neural networks', 'data mining', 'statistics', 'predictive analytics',
             'NLP', 'computer vision', 'tensorflow', 'pytorch', 'scikit-learn'
         ]
+        self._keywords_lower = [keyword.lower() for keyword in self.data_science_keywords]
 
     def login(self, email: str, password: str) -> bool:
         """
@@ -46,18 +48,18 @@ class LinkedInScraper:
             print(f"Login failed: {str(e)}")
             return False
 
-    def _is_data_science_related(self, content: str) -> bool:
+    def _is_data_science_related(self, post: Post) -> bool:
         """
         Check if the post content is related to data science
         """
-        content_lower = content.lower()
-        return any(keyword.lower() in content_lower for keyword in self.data_science_keywords)
+        return post.match_keywords({'data_science': self._keywords_lower})['data_science'] > 0
 
-    def get_trending_posts(self, num_posts: int = 10) -> List[Dict]:
+    def get_trending_posts(self, num_posts: int = 10) -> List[Post]:
         """
         Scrape trending posts from LinkedIn feed, focusing on data science content
         """
         trending_posts = []
+        seen_ids = set()
         data_science_posts_found = 0
         try:
             # Navigate to LinkedIn feed
@@ -79,8 +81,9 @@ class LinkedInScraper:
                     try:
                         # Extract post information
                         post_data = self._extract_post_data(post)
-                        if post_data and self._is_data_science_related(post_data['content']):
-                            if post_data not in trending_posts:  # Avoid duplicates
+                        if post_data and self._is_data_science_related(post_data):
+                            if post_data.id not in seen_ids:  # Avoid duplicates
+                                seen_ids.add(post_data.id)
                                 trending_posts.append(post_data)
                                 data_science_posts_found += 1
                                 if data_science_posts_found >= num_posts:
@@ -115,7 +118,7 @@ class LinkedInScraper:
             posts_loaded = len(posts)
             scroll_count += 1
 
-    def _extract_post_data(self, post_element) -> Dict:
+    def _extract_post_data(self, post_element) -> Post:
         """
         Extract relevant data from a post element
         """
@@ -144,13 +147,13 @@ class LinkedInScraper:
                 "button.social-details-social-counts__comments-count"
             )
             
-            return {
-                "author": author_name,
-                "content": content,
-                "reactions": reactions,
-                "comments": comments,
-                "timestamp": time.time()
-            }
+            return Post(
+                content,
+                author_name,
+                urn=post_element.get_attribute("data-urn"),
+                reactions=reactions,
+                comments=comments
+            )
             
         except Exception as e:
             print(f"Error extracting post data: {str(e)}")
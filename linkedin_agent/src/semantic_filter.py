@@ -0,0 +1,204 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+import numpy as np
+from post_record import Post, content_hash
+
+try:
+    import fcntl
+except ImportError:  # Windows has no fcntl; appends stay unserialised
+    fcntl = None
+
+# Curated examples of the content we want; candidates are scored against these
+DEFAULT_CENTROID_TEXTS = [
+    "Practical guide to a new Python library for data analysis with pandas and numpy, including code tips",
+    "Release announcement of a machine learning framework version with new features and performance improvements",
+    "Best practices for deploying and monitoring ML models in production with MLOps tooling such as MLflow",
+    "Comparison and benchmark of data engineering tools like Spark, Airflow, dbt and Kafka for pipelines",
+    "Tutorial on training and fine-tuning deep learning models with PyTorch or TensorFlow",
+    "How to build analytics dashboards and data visualizations with Tableau, Power BI, Plotly or Streamlit",
+    "Architecture of a modern data platform on Databricks, Snowflake or cloud services for big data",
+    "Using large language models and Hugging Face transformers in real data science workflows"
+]
+
+
+class LocalEmbedder:
+    """
+    Dependency-free stand-in model: counts of hashed word and word-bigram
+    features. Much weaker than a real embedding model but free and offline.
+    """
+
+    name = 'local-hash-512'
+    # Hashed counts score on-topic posts around 0.3 and barely separate them, so rank without a cutoff
+    default_threshold = 0.0
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = re.findall(r'[a-z0-9+#]+', text.lower())
+            for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+                bucket = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=4).digest(), 'little')
+                vectors[row, bucket % self.dim] += 1.0
+        return vectors
+
+
+class GeminiEmbedder:
+    """Batched embeddings from the Gemini embedding API"""
+
+    default_threshold = 0.5
+
+    def __init__(self, model: str = None, batch_size: int = 100):
+        import google.generativeai as genai
+        self.genai = genai
+        self.model = model or os.getenv('GEMINI_EMBEDDING_MODEL', 'models/text-embedding-004')
+        self.name = self.model.split('/')[-1]
+        self.batch_size = batch_size
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = [text[:8000] for text in texts[start:start + self.batch_size]]
+            result = self.genai.embed_content(model=self.model, content=batch, task_type='SEMANTIC_SIMILARITY')
+            vectors.extend(result['embedding'])
+        return np.asarray(vectors, dtype=np.float32)
+
+
+class EmbeddingCache:
+    """
+    Append-only on-disk embedding cache keyed by content hash. Vectors live in a
+    raw float32 file that is memory-mapped for reads; the hash -> row index is a
+    small JSON file rewritten atomically after each append. Appends are
+    serialised with a file lock, so several processes can share one cache.
+    """
+
+    def __init__(self, directory: str, dim: int = None):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.vectors_path = self.directory / 'vectors.f32'
+        self.index_path = self.directory / 'index.json'
+        self.lock_path = self.directory / '.lock'
+        self.dim = dim
+        self.rows = {}
+        self._matrix = None
+        self._load_index()
+
+    def _load_index(self):
+        if self.index_path.exists():
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            self.dim = index['dim']
+            self.rows = {key: row for row, key in enumerate(index['hashes'])}
+
+    def _row_count(self) -> int:
+        if not self.dim or not self.vectors_path.exists():
+            return 0
+        # Only trust rows that are fully written and indexed
+        return min(len(self.rows), self.vectors_path.stat().st_size // (4 * self.dim))
+
+    def matrix(self) -> np.ndarray:
+        """Memory-mapped (rows x dim) view of all cached vectors"""
+        rows = self._row_count()
+        if rows == 0:
+            return np.zeros((0, self.dim or 0), dtype=np.float32)
+        if self._matrix is None or self._matrix.shape[0] != rows:
+            self._matrix = np.memmap(self.vectors_path, dtype=np.float32, mode='r', shape=(rows, self.dim))
+        return self._matrix
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        matrix = self.matrix()
+        return {key: matrix[self.rows[key]] for key in keys if self.rows.get(key, matrix.shape[0]) < matrix.shape[0]}
+
+    def add_many(self, keys: List[str], vectors: np.ndarray):
+        if not keys:
+            return
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        lock_file = None
+        try:
+            if fcntl is not None:
+                lock_file = open(self.lock_path, 'a')
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            # Re-read under the lock so rows appended by another process are not overwritten
+            self._load_index()
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+            fresh = [row for row, key in enumerate(keys) if key not in self.rows]
+            if not fresh:
+                return
+            ordered = sorted(self.rows, key=self.rows.get)
+
+            # Drop any unindexed tail (a crash after the append), so row numbers match file offsets
+            with open(self.vectors_path, 'ab') as f:
+                f.truncate(len(ordered) * self.dim * 4)
+                f.write(vectors[fresh].tobytes())
+            for row in fresh:
+                self.rows[keys[row]] = len(ordered)
+                ordered.append(keys[row])
+
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'dim': self.dim, 'hashes': ordered}, f)
+            os.replace(tmp_path, self.index_path)
+        finally:
+            if lock_file is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                lock_file.close()
+            self._matrix = None
+
+def _normalise(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class SemanticFilter:
+    """
+    Scores keyword-prefiltered posts by cosine similarity to a curated centroid
+    set. Embeddings are cached by content hash, so each text is embedded once.
+    """
+
+    def __init__(self, embedder=None, cache_dir: str = None, centroid_texts: List[str] = None):
+        if embedder is None:
+            embedder = GeminiEmbedder() if os.getenv('SEMANTIC_EMBEDDER', 'gemini') == 'gemini' else LocalEmbedder()
+        self.embedder = embedder
+        cache_root = cache_dir or os.getenv('EMBEDDING_CACHE_DIR', '.embedding_cache')
+        self.cache = EmbeddingCache(os.path.join(cache_root, embedder.name))
+        threshold = os.getenv('SEMANTIC_THRESHOLD')
+        self.threshold = float(threshold) if threshold else getattr(embedder, 'default_threshold', 0.5)
+        self.centroids = _normalise(self._embed_texts(centroid_texts or DEFAULT_CENTROID_TEXTS))
+
+    def _embed(self, keys: List[str], texts: List[str]) -> np.ndarray:
+        """Embed texts by content hash, serving cached vectors and batching only the misses"""
+        cached = self.cache.get_many(keys)
+        missing = list(dict.fromkeys(key for key in keys if key not in cached))
+        if missing:
+            text_by_key = dict(zip(keys, texts))
+            fresh = self.embedder.embed([text_by_key[key] for key in missing])
+            self.cache.add_many(missing, fresh)
+            cached.update(zip(missing, fresh))
+        return np.vstack([cached[key] for key in keys]).astype(np.float32)
+
+    def _embed_texts(self, texts: List[str]) -> np.ndarray:
+        return self._embed([content_hash(text.lower()) for text in texts], texts)
+
+    def score(self, posts: List[Post]) -> np.ndarray:
+        """Best cosine similarity of each post to any centroid"""
+        if not posts:
+            return np.zeros(0, dtype=np.float32)
+        vectors = self._embed([post.content_hash for post in posts], [post.content for post in posts])
+        return (_normalise(vectors) @ self.centroids.T).max(axis=1)
+
+    def select(self, posts: List[Post], top_k: int) -> List[Post]:
+        """Top-k posts above the similarity threshold, best first"""
+        scores = self.score(posts)
+        if scores.size == 0:
+            return []
+        k = min(top_k, scores.size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [posts[i] for i in top if scores[i] >= self.threshold]
@@ -0,0 +1,337 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List
+from log_setup import setup_logging
+
+try:
+    import psutil
+except ImportError:  # fall back to /proc on Linux
+    psutil = None
+
+PID_DIR = '.pid'
+PID_FILE = os.path.join(PID_DIR, 'agent.pid')
+STATUS_FILE = os.path.join(PID_DIR, 'supervisor.json')
+LAST_RUN_FILE = os.path.join(PID_DIR, 'last_run.json')
+BROWSER_PROCESS_NAMES = ('chrome', 'chromium', 'chromium-browser', 'google-chrome', 'chromedriver')
+
+
+def _write_json(path: str, data: Dict):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2, default=str)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path: str) -> Dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _list_processes() -> List[Dict]:
+    """pid, ppid, pgid, rss (bytes), uid, name and cmdline of every live (non-zombie) process"""
+    processes = []
+    if psutil is not None:
+        for proc in psutil.process_iter(['pid', 'ppid', 'name', 'cmdline', 'memory_info', 'uids', 'status']):
+            try:
+                info = proc.info
+                if info['status'] == psutil.STATUS_ZOMBIE:
+                    continue
+                processes.append({
+                    'pid': info['pid'], 'ppid': info['ppid'], 'pgid': os.getpgid(info['pid']),
+                    'rss': info['memory_info'].rss if info['memory_info'] else 0,
+                    'uid': info['uids'].real if info['uids'] else None,
+                    'name': info['name'] or '', 'cmdline': ' '.join(info['cmdline'] or [])
+                })
+            except (psutil.Error, ProcessLookupError, PermissionError):
+                continue
+        return processes
+
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                stat = f.read()
+            # The process name is in parentheses and may itself contain spaces
+            name = stat[stat.index('(') + 1:stat.rindex(')')]
+            fields = stat[stat.rindex(')') + 2:].split()
+            if fields[0] == 'Z':
+                continue
+            with open(f'/proc/{entry}/cmdline', 'rb') as f:
+                cmdline = f.read().replace(b'\0', b' ').decode(errors='replace').strip()
+            processes.append({
+                'pid': int(entry), 'ppid': int(fields[1]), 'pgid': int(fields[2]),
+                'rss': int(fields[21]) * page_size, 'uid': os.stat(f'/proc/{entry}').st_uid,
+                'name': name, 'cmdline': cmdline
+            })
+        except (OSError, ValueError, IndexError):
+            continue
+    return processes
+
+
+def process_group_rss(pgid: int) -> int:
+    """Total resident memory of every process in a process group, in bytes"""
+    return sum(proc['rss'] for proc in _list_processes() if proc['pgid'] == pgid)
+
+
+def _process_pss(proc: Dict) -> int:
+    """
+    Proportional set size of a process in bytes: shared pages are split between
+    the processes sharing them, so Chrome's renderers aren't counted N times.
+    Falls back to RSS where the kernel doesn't report PSS.
+    """
+    try:
+        with open(f"/proc/{proc['pid']}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith('Pss:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    if psutil is not None:
+        try:
+            memory = psutil.Process(proc['pid']).memory_full_info()
+            return getattr(memory, 'pss', None) or memory.uss
+        except (psutil.Error, AttributeError):
+            pass
+    return proc['rss']
+
+
+def process_group_pss(pgid: int) -> int:
+    """Total proportional memory of every process in a process group, in bytes"""
+    return sum(_process_pss(proc) for proc in _list_processes() if proc['pgid'] == pgid)
+
+
+def kill_process_group(pgid: int, grace: float = 10):
+    """SIGTERM a whole process group, then SIGKILL whatever is left after the grace period"""
+    try:
+        os.killpg(pgid, signal.SIGTERM)
+    except ProcessLookupError:
+        return
+    deadline = time.monotonic() + grace
+    while time.monotonic() < deadline:
+        if not any(proc['pgid'] == pgid for proc in _list_processes()):
+            return
+        time.sleep(0.5)
+    try:
+        os.killpg(pgid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+def reap_orphaned_browsers() -> int:
+    """
+    Kill headless Chrome/chromedriver processes of this user that were orphaned
+    (re-parented to init) by an agent run that died. Returns the number killed.
+    """
+    killed = 0
+    uid = os.getuid()
+    for proc in _list_processes():
+        name = proc['name'].lower()
+        if proc['uid'] != uid or proc['ppid'] != 1 or not name.startswith(BROWSER_PROCESS_NAMES):
+            continue
+        if 'chromedriver' not in name and '--headless' not in proc['cmdline']:
+            continue  # never touch a user's interactive browser
+        try:
+            os.kill(proc['pid'], signal.SIGKILL)
+            killed += 1
+        except (ProcessLookupError, PermissionError):
+            continue
+    if killed:
+        logging.warning(f"Reaped {killed} orphaned browser processes")
+    return killed
+
+
+def _job_entry(target, args, kwargs):
+    # Own process group, so the job and every browser it spawns can be killed together
+    os.setsid()
+    try:
+        target(*args, **kwargs)
+    except Exception as e:
+        logging.error(f"Job failed: {str(e)}", exc_info=True)
+        sys.exit(1)
+
+
+def run_with_limits(target, args=(), kwargs=None, timeout: float = None, max_rss_mb: float = None,
+                    label: str = 'agent-run') -> Dict:
+    """
+    Run target in a child process with a wall-clock deadline and a memory cap
+    (PSS, see _process_pss) on its whole process tree. Returns an outcome dict with 'status' of ok, failed,
+    timeout or memory_limit.
+    """
+    timeout = timeout or float(os.getenv('AGENT_RUN_TIMEOUT', 1800))
+    max_rss_mb = max_rss_mb or float(os.getenv('AGENT_MAX_RSS_MB', 1536))
+
+    started = time.monotonic()
+    process = multiprocessing.Process(target=_job_entry, args=(target, args, kwargs or {}), name=label)
+    process.start()
+    outcome = {'label': label, 'pid': process.pid, 'started_at': datetime.now().isoformat()}
+    peak_pss = 0
+
+    try:
+        while process.is_alive():
+            process.join(timeout=2)
+            elapsed = time.monotonic() - started
+            pss = process_group_pss(process.pid)
+            peak_pss = max(peak_pss, pss)
+            if elapsed > timeout:
+                logging.error(f"{label} exceeded {timeout:.0f}s deadline, killing process tree")
+                outcome['status'] = 'timeout'
+                break
+            if pss > max_rss_mb * 1024 * 1024:
+                logging.error(f"{label} exceeded {max_rss_mb:.0f} MB memory ({pss / 1048576:.0f} MB PSS), "
+                              f"killing process tree")
+                outcome['status'] = 'memory_limit'
+                break
+    finally:
+        # Always clean up the group, also when the scheduler itself is being stopped:
+        # a finished job can still leave browsers behind
+        kill_process_group(process.pid)
+        process.join(timeout=5)
+
+    outcome.setdefault('status', 'ok' if process.exitcode == 0 else 'failed')
+    outcome.update({
+        'exitcode': process.exitcode,
+        'duration_seconds': round(time.monotonic() - started, 1),
+        'peak_pss_mb': round(peak_pss / 1048576, 1),
+        'finished_at': datetime.now().isoformat()
+    })
+    _write_json(LAST_RUN_FILE, outcome)
+    return outcome
+
+
+def supervise(command: List[str]):
+    """Run the scheduler, restarting it with exponential backoff whenever it exits"""
+    os.makedirs(PID_DIR, exist_ok=True)
+    with open(PID_FILE, 'w') as f:
+        f.write(str(os.getpid()))
+
+    reap_orphaned_browsers()
+
+    child = None
+    stopping = []
+
+    def shutdown(*_):
+        stopping.append(True)
+        if child and child.poll() is None:
+            kill_process_group(child.pid)
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    restarts = 0
+    backoff = 5
+    max_backoff = float(os.getenv('SUPERVISOR_MAX_BACKOFF', 600))
+    status = {'supervisor_pid': os.getpid(), 'started_at': datetime.now().isoformat(), 'restarts': 0}
+
+    try:
+        while not stopping:
+            started = time.monotonic()
+            child = subprocess.Popen(command, start_new_session=True)
+            status.update({'scheduler_pid': child.pid, 'scheduler_started_at': datetime.now().isoformat()})
+            _write_json(STATUS_FILE, status)
+            logging.info(f"Started scheduler (PID {child.pid})")
+
+            exitcode = child.wait()
+            kill_process_group(child.pid)
+            if stopping:
+                break
+
+            # A scheduler that stayed up for a while resets the backoff
+            if time.monotonic() - started > 600:
+                backoff = 5
+            restarts += 1
+            status.update({'restarts': restarts, 'last_exit': exitcode, 'last_exit_at': datetime.now().isoformat()})
+            _write_json(STATUS_FILE, status)
+            logging.warning(f"Scheduler exited with code {exitcode}; restarting in {backoff:.0f}s")
+            reap_orphaned_browsers()
+            time.sleep(backoff)
+            backoff = min(backoff * 2, max_backoff)
+    finally:
+        status['scheduler_pid'] = None
+        _write_json(STATUS_FILE, status)
+        if os.path.exists(PID_FILE):
+            os.remove(PID_FILE)
+
+
+def print_status(log_file: str = 'logs/linkedin_agent.log') -> int:
+    """Print supervisor, scheduler and last-run status; exit code 0 if running"""
+    try:
+        with open(PID_FILE) as f:
+            pid = int(f.read().strip())
+    except (OSError, ValueError):
+        pid = None
+
+    if pid is None:
+        print("LinkedIn Agent is not running")
+        return 1
+    if not _pid_alive(pid):
+        print("LinkedIn Agent is not running (stale PID file)")
+        os.remove(PID_FILE)
+        return 1
+
+    status = _read_json(STATUS_FILE)
+    print(f"LinkedIn Agent is running (supervisor PID: {pid})")
+    scheduler_pid = status.get('scheduler_pid')
+    if scheduler_pid:
+        state = 'running' if _pid_alive(scheduler_pid) else 'not running'
+        print(f"Scheduler PID {scheduler_pid}: {state}, RSS {process_group_rss(scheduler_pid) / 1048576:.0f} MB")
+    print(f"Restarts: {status.get('restarts', 0)}"
+          + (f" (last exit code {status['last_exit']} at {status['last_exit_at']})" if 'last_exit' in status else ""))
+
+    last_run = _read_json(LAST_RUN_FILE)
+    if last_run:
+        print(f"Last run: {last_run.get('status')} at {last_run.get('finished_at')}, "
+              f"{last_run.get('duration_seconds')}s, peak {last_run.get('peak_pss_mb')} MB")
+
+    if os.path.exists(log_file):
+        print("Recent logs:")
+        with open(log_file, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(f.tell() - 4096, 0))
+            for line in f.read().decode(errors='replace').splitlines()[-5:]:
+                print(line)
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LinkedIn agent process supervisor")
+    parser.add_argument('command', choices=['run', 'status', 'reap'])
+    parser.add_argument('scheduler_args', nargs=argparse.REMAINDER,
+                        help="Extra arguments passed to scheduler.py (e.g. --profile)")
+    args = parser.parse_args()
+
+    if args.command == 'status':
+        sys.exit(print_status())
+    elif args.command == 'reap':
+        print(f"Reaped {reap_orphaned_browsers()} orphaned browser processes")
+    else:
+        setup_logging('logs/supervisor.log')
+        scheduler = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scheduler.py')
+        supervise([sys.executable, scheduler, *args.scheduler_args])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+import argparse
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from dotenv import load_dotenv
+from job_queue import get_job_queue
+from post_record import Post
+from log_setup import setup_logging, shutdown_logging, log_context
+
+# Queue names; each role leases from the queues listed for it, in priority order
+SCRAPE_QUEUE = 'scrape'
+TRIAGE_QUEUE = 'triage'
+DRAFT_QUEUE = 'draft'
+PUBLISH_QUEUE = 'publish'
+
+ROLE_QUEUES = {
+    'scraper': [SCRAPE_QUEUE],
+    'generator': [TRIAGE_QUEUE, DRAFT_QUEUE],
+    'publisher': [PUBLISH_QUEUE]
+}
+
+# Lease (visibility timeout) per queue: short enough to recover from a crash quickly.
+# Workers renew the lease while a job runs, so jobs may take longer than this.
+LEASE_SECONDS = {
+    SCRAPE_QUEUE: 600,
+    TRIAGE_QUEUE: 120,
+    DRAFT_QUEUE: 300,
+    PUBLISH_QUEUE: 120
+}
+
+
+def enqueue_scrape(queue=None, num_posts: int = None, top_k: int = None) -> str:
+    """Request a scrape -> generate -> publish cycle from the worker pool"""
+    queue = queue or get_job_queue()
+    return queue.enqueue(SCRAPE_QUEUE, {
+        'num_posts': num_posts or int(os.getenv('POSTS_PER_FETCH', 10)),
+        'top_k': top_k or int(os.getenv('POSTS_PER_RUN', 1))
+    })
+
+
+class Worker:
+    """Long-lived worker that leases jobs for one role and processes them until stopped"""
+
+    def __init__(self, role: str, queue_url: str = None, poll_interval: float = 5):
+        self.role = role
+        self.queue = get_job_queue(queue_url)
+        self.poll_interval = poll_interval
+        self.stopping = False
+        self.agent = None
+
+    def _create_agent(self):
+        # Imported here so publisher/generator processes never import Selenium state they don't use
+        from linkedin_agent import LinkedInAgent
+        return LinkedInAgent(
+            use_gemini=self.role == 'generator',
+            use_browser=self.role == 'scraper'
+        )
+
+    def stop(self, *_):
+        self.stopping = True
+
+    def handle(self, job):
+        """Process one job; raising marks it failed for a later retry"""
+        payload = job.payload
+        # Each job gets its own time/token/call budget and regeneration allowance
+        self.agent.start_run()
+
+        if job.queue == SCRAPE_QUEUE:
+            posts = self.agent.collect_posts(num_posts=payload['num_posts'])
+            self.agent.relevance_filter.save_stats()
+            if posts:
+                self.queue.enqueue(TRIAGE_QUEUE, {
+                    'posts': [post.to_row() for post in posts],
+                    'top_k': payload['top_k']
+                })
+
+        elif job.queue == TRIAGE_QUEUE:
+            selected = self.agent.router.select_candidates(
+                [Post.from_row(row) for row in payload['posts']], self.agent.keyword_sets(), top_k=payload['top_k']
+            )
+            for post in selected:
+                self.queue.enqueue(DRAFT_QUEUE, {'post': post.to_row()})
+
+        elif job.queue == DRAFT_QUEUE:
+            post = Post.from_row(payload['post'])
+            content = self.agent.analyze_post(post.content)
+            if content:
+                self.queue.enqueue(PUBLISH_QUEUE, {'content': content, 'source': post.to_row()})
+
+        elif job.queue == PUBLISH_QUEUE:
+            source = Post.from_row(payload['source'])
+            # A lease that was lost (worker crash mid-publish) may hide a post that did go out
+            if job.attempts > 1:
+                raise RuntimeError(f"Not republishing after an interrupted attempt ({job.attempts - 1} before)")
+            if self.agent.drafts.has_source(source.content_hash):
+                logging.warning(f"Skipping publish job {job.id}, its source post was already published")
+                return
+            if not self.agent.create_post(payload['content']):
+                raise RuntimeError("LinkedIn rejected the post")
+            self.agent.drafts.record_published(payload['content'], source)
+
+    @contextmanager
+    def keep_leased(self, job):
+        """Renew the job's lease in the background while it is being processed"""
+        lease_seconds = LEASE_SECONDS[job.queue]
+        done = threading.Event()
+
+        def heartbeat():
+            while not done.wait(lease_seconds / 3):
+                try:
+                    self.queue.extend(job, lease_seconds)
+                except Exception as e:
+                    logging.warning(f"Could not extend lease of {job}: {str(e)}")
+
+        thread = threading.Thread(target=heartbeat, name=f"lease-{job.id}", daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            done.set()
+            thread.join()
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        self.agent = self._create_agent()
+        logging.info(f"{self.role} worker {os.getpid()} started")
+
+        try:
+            while not self.stopping:
+                job = None
+                for queue_name in ROLE_QUEUES[self.role]:
+                    job = self.queue.lease(queue_name, LEASE_SECONDS[queue_name])
+                    if job:
+                        break
+                if job is None:
+                    time.sleep(self.poll_interval)
+                    continue
+
+                try:
+                    with log_context(run_id=job.id, stage=job.queue), self.keep_leased(job):
+                        self.handle(job)
+                    self.queue.ack(job)
+                except Exception as e:
+                    logging.error(f"{self.role} worker failed {job}: {str(e)}", exc_info=True)
+                    # A failed publish may still have gone out (timeouts), so it is parked, not retried
+                    self.queue.fail(job, retry_delay=min(30 * 2 ** job.attempts, 900),
+                                    retry=job.queue != PUBLISH_QUEUE)
+
+                if job.queue == PUBLISH_QUEUE:
+                    # Space out publishes to avoid rate limiting, outside the lease
+                    time.sleep(int(os.getenv('PUBLISH_SPACING_SECONDS', 60)))
+        finally:
+            if self.agent:
+                self.agent.close()
+            logging.info(f"{self.role} worker {os.getpid()} stopped")
+
+
+def _worker_main(role: str, queue_url: str):
+    load_dotenv()
+    setup_logging(f"logs/worker-{role}-{os.getpid()}.log")
+    try:
+        Worker(role, queue_url).run()
+    finally:
+        # Process children exit without atexit handlers; flush the listener here
+        shutdown_logging()
+
+
+def run_pool(counts, queue_url: str = None):
+    """Start the configured number of processes per role and restart any that exit"""
+    processes = {}
+    stopping = []
+
+    def shutdown(*_):
+        stopping.append(True)
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    def spawn(role, index):
+        process = multiprocessing.Process(
+            target=_worker_main, args=(role, queue_url), name=f"{role}-{index}", daemon=False
+        )
+        process.start()
+        processes[(role, index)] = process
+
+    for role, count in counts.items():
+        for index in range(count):
+            spawn(role, index)
+    logging.info(f"Worker pool started: {counts}")
+
+    while not stopping:
+        time.sleep(5)
+        for (role, index), process in list(processes.items()):
+            if not process.is_alive() and not stopping:
+                logging.warning(f"{process.name} exited with code {process.exitcode}, restarting")
+                spawn(role, index)
+
+    for process in processes.values():
+        process.terminate()
+    for process in processes.values():
+        process.join(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run LinkedIn agent workers")
+    parser.add_argument('--scrapers', type=int, default=int(os.getenv('SCRAPER_WORKERS', 1)))
+    parser.add_argument('--generators', type=int, default=int(os.getenv('GENERATOR_WORKERS', 1)))
+    parser.add_argument('--publishers', type=int, default=int(os.getenv('PUBLISHER_WORKERS', 1)))
+    parser.add_argument('--queue-url', default=None, help="sqlite:///jobs.db (default) or redis://host:port/db")
+    parser.add_argument('--enqueue-scrape', action='store_true', help="Enqueue one scrape job and exit")
+    parser.add_argument('--status', action='store_true', help="Print job counts per queue and exit")
+    args = parser.parse_args()
+
+    load_dotenv()
+
+    if args.enqueue_scrape:
+        print(f"Enqueued scrape job {enqueue_scrape(get_job_queue(args.queue_url))}")
+    elif args.status:
+        for queue_name, statuses in sorted(get_job_queue(args.queue_url).counts().items()):
+            print(f"{queue_name}: {statuses}")
+    else:
+        setup_logging("logs/workers.log")
+        run_pool({
+            'scraper': args.scrapers,
+            'generator': args.generators,
+            'publisher': args.publishers
+        }, args.queue_url)
+
+
+if __name__ == "__main__":
+    main()
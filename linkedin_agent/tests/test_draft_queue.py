@@ -0,0 +1,75 @@
+import sqlite3
+import time
+
+import pytest
+
+import draft_queue
+from draft_queue import DraftQueue
+from post_record import Post
+
+
+@pytest.fixture
+def drafts(tmp_path):
+    return DraftQueue(str(tmp_path / 'drafts.db'), max_age_hours=1)
+
+
+def _backdate(drafts, column, seconds):
+    with sqlite3.connect(drafts.path) as conn:
+        conn.execute(f"UPDATE drafts SET {column} = {column} - ?", (seconds,))
+
+
+def test_claim_best_takes_highest_score_once(drafts):
+    drafts.add('low', Post('source one'), 0.2)
+    best = drafts.add('high', Post('source two'), 0.9)
+
+    claimed = drafts.claim_best()
+    assert claimed['id'] == best
+    assert claimed['content'] == 'high'
+    assert claimed['source'].content == 'source two'
+    assert drafts.claim_best()['content'] == 'low'
+    assert drafts.claim_best() is None
+
+
+def test_duplicate_source_is_not_drafted_twice(drafts):
+    drafts.add('first', Post('same source'), 0.5)
+    assert drafts.add('second', Post('same source'), 0.9) is None
+    assert drafts.ready_count() == 1
+
+
+def test_stale_drafts_expire_instead_of_publishing(drafts):
+    drafts.add('old', Post('old source'), 0.9)
+    _backdate(drafts, 'created_at', 2 * 3600)
+
+    assert drafts.ready_count() == 0
+    assert drafts.claim_best() is None
+
+
+def test_release_puts_draft_back(drafts):
+    draft_id = drafts.add('content', Post('source'), 0.5)
+    drafts.release(drafts.claim_best()['id'])
+
+    assert drafts.ready_count() == 1
+    assert drafts.claim_best()['id'] == draft_id
+
+
+def test_published_and_abandoned_drafts_are_not_reclaimed(drafts):
+    drafts.add('published', Post('source one'), 0.5)
+    drafts.add('abandoned', Post('source two'), 0.5)
+    drafts.mark_published(drafts.claim_best()['id'])
+    drafts.abandon(drafts.claim_best()['id'])
+
+    assert drafts.claim_best() is None
+    assert drafts.has_source(Post('source one').content_hash)
+    assert drafts.has_source(Post('source two').content_hash)
+
+
+def test_stuck_publishing_draft_is_abandoned(drafts):
+    source = Post('source')
+    drafts.add('content', source, 0.5)
+    drafts.claim_best()
+    _backdate(drafts, 'updated_at', draft_queue.STUCK_PUBLISHING_SECONDS + 1)
+
+    assert drafts.claim_best() is None
+    assert drafts.has_source(source.content_hash)
+    with sqlite3.connect(drafts.path) as conn:
+        assert conn.execute("SELECT status FROM drafts").fetchone()[0] == 'abandoned'
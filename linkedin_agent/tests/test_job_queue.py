@@ -0,0 +1,100 @@
+import time
+
+import pytest
+
+from job_queue import JobQueue, SQLiteJobQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return SQLiteJobQueue(str(tmp_path / 'jobs.db'), max_attempts=2)
+
+
+def test_interface_methods_are_abstract():
+    class Incomplete(JobQueue):
+        def enqueue(self, queue, payload, delay=0):
+            return 'id'
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_lease_hides_job_until_ack(queue):
+    job_id = queue.enqueue('publish', {'content': 'hello'})
+
+    job = queue.lease('publish', 60)
+    assert job.id == job_id
+    assert job.payload == {'content': 'hello'}
+    assert job.attempts == 1
+    assert queue.lease('publish', 60) is None
+
+    queue.ack(job)
+    assert queue.counts() == {}
+
+
+def test_delayed_job_is_not_leased_early(queue):
+    queue.enqueue('scrape', {}, delay=60)
+    assert queue.lease('scrape', 60) is None
+
+
+def test_expired_lease_is_leased_again_and_stale_ack_is_ignored(queue):
+    queue.enqueue('scrape', {})
+    first = queue.lease('scrape', 0.05)
+    time.sleep(0.1)
+
+    second = queue.lease('scrape', 60)
+    assert second.id == first.id
+    assert second.attempts == 2
+
+    queue.ack(first)  # the first worker lost its lease
+    assert queue.counts() == {'scrape': {'leased': 1}}
+    queue.ack(second)
+    assert queue.counts() == {}
+
+
+def test_extend_keeps_job_leased(queue):
+    queue.enqueue('scrape', {})
+    job = queue.lease('scrape', 0.2)
+    for _ in range(3):
+        time.sleep(0.1)
+        queue.extend(job, 0.2)
+    assert queue.lease('scrape', 60) is None
+
+
+def test_fail_retries_after_delay(queue):
+    queue.enqueue('draft', {})
+    job = queue.lease('draft', 60)
+
+    queue.fail(job, retry_delay=0)
+    retried = queue.lease('draft', 60)
+    assert retried.id == job.id
+    assert retried.attempts == 2
+
+
+def test_fail_without_retry_parks_job(queue):
+    queue.enqueue('publish', {})
+    job = queue.lease('publish', 60)
+
+    queue.fail(job, retry_delay=0, retry=False)
+    assert queue.lease('publish', 60) is None
+    assert queue.counts() == {'publish': {'dead': 1}}
+
+
+def test_job_is_dead_lettered_after_max_attempts(queue):
+    queue.enqueue('draft', {})
+    for _ in range(2):
+        job = queue.lease('draft', 60)
+        queue.fail(job, retry_delay=0)
+
+    assert queue.lease('draft', 60) is None
+    assert queue.counts() == {'draft': {'dead': 1}}
+
+
+def test_expired_leases_count_towards_max_attempts(queue):
+    queue.enqueue('scrape', {})
+    for _ in range(2):
+        assert queue.lease('scrape', 0.01) is not None
+        time.sleep(0.05)
+
+    assert queue.lease('scrape', 60) is None
+    assert queue.counts() == {'scrape': {'dead': 1}}
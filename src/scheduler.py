@@ -2,14 +2,37 @@ import schedule
 import time
 import os
 from dotenv import load_dotenv
-from linkedin_agent import LinkedInAgent
+from linkedin_agent import LinkedInAgent, PUBLISHED, REJECTED, UNCERTAIN
+from draft_queue import lead_minutes, pregeneration_start, pregeneration_timeout
 from datetime import datetime
 
+def prepare_drafts():
+    """
+    Pre-generate drafts ahead of the next slot, so the slot itself only publishes
+    """
+    try:
+        agent = LinkedInAgent()
+        # Leave a minute of the lead for shutdown, so the slot starts on time
+        agent.prepare_drafts(deadline_seconds=pregeneration_timeout(lead_minutes()) - 60)
+    except Exception as e:
+        print(f"Error pre-generating drafts: {str(e)}")
+
 def run_agent():
     """
     Initialize and run the LinkedIn agent
     """
+    agent = None
     try:
+        # Publish a pre-generated draft if one is ready; generate on demand otherwise
+        if lead_minutes() > 0:
+            outcome = LinkedInAgent(use_gemini=False, use_browser=False).publish_ready_draft()
+            if outcome == PUBLISHED:
+                return
+            if outcome == UNCERTAIN:
+                # The draft may be live; a second post in the same slot is worse than none
+                print("Pre-generated draft may have been published, skipping on-demand generation")
+                return
+        
         agent = LinkedInAgent()
         
         # Get current hour to determine which set of posts to use
@@ -18,26 +41,36 @@ def run_agent():
         # Morning post (more technical/tutorial content)
         if 9 <= current_hour < 12:
             print("Executing morning post (technical content)")
-            trending_posts = agent.scrape_trending_posts(num_posts=3)  # Get more posts to choose from
+            # Content sources first, Chrome only if they fall short; already-used posts are left out
+            trending_posts = agent.collect_posts(num_posts=3)  # Get more posts to choose from
             if trending_posts:
-                # Select the most detailed/technical post
-                selected_post = max(trending_posts, key=lambda x: len(x['content']))
-                new_content = agent.analyze_post(selected_post['content'])
+                # Triage candidates with the cheap model and keep the best one
+                selected_post = agent.router.select_candidates(trending_posts, agent.keyword_sets(), top_k=1)[0]
+                new_content = agent.analyze_post(selected_post.content)
                 if new_content:
                     agent.create_post(new_content)
+                    if agent.last_publish != REJECTED:
+                        agent.drafts.record_published(new_content, selected_post)
                     
         # Evening post (case studies/practical applications)
         elif 14 <= current_hour < 17:
             print("Executing evening post (practical applications)")
-            trending_posts = agent.scrape_trending_posts(num_posts=3)  # Get more posts to choose from
+            # Content sources first, Chrome only if they fall short; already-used posts are left out
+            trending_posts = agent.collect_posts(num_posts=3)  # Get more posts to choose from
             if trending_posts:
-                # Select the most detailed/technical post
-                selected_post = max(trending_posts, key=lambda x: len(x['content']))
-                new_content = agent.analyze_post(selected_post['content'])
+                # Triage candidates with the cheap model and keep the best one
+                selected_post = agent.router.select_candidates(trending_posts, agent.keyword_sets(), top_k=1)[0]
+                new_content = agent.analyze_post(selected_post.content)
                 if new_content:
                     agent.create_post(new_content)
+                    if agent.last_publish != REJECTED:
+                        agent.drafts.record_published(new_content, selected_post)
     except Exception as e:
         print(f"Error running agent: {str(e)}")
+    finally:
+        # collect_posts may have started Chrome
+        if agent is not None:
+            agent.close()
 
 def main():
     """
@@ -53,6 +86,12 @@ def main():
     # Schedule evening post (around 3 PM)
     schedule.every().day.at("15:00").do(run_agent)
     
+    # Pre-generate drafts PREGENERATE_LEAD_MINUTES before each post
+    lead = lead_minutes()
+    if lead > 0:
+        for hour in [10, 15]:
+            schedule.every().day.at(pregeneration_start(hour, lead)).do(prepare_drafts)
+    
     # Run the agent once immediately if within posting hours
     current_hour = datetime.now().hour
     if (9 <= current_hour < 12) or (14 <= current_hour < 17):